@@ -0,0 +1,113 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+def normalize_prompt(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(PUNCTUATION.sub(" ", text.lower()).split())
+
+class AgentResponseCache:
+    """TTL + LRU cache of agent answers, in front of ``AgentExecutor.invoke``.
+
+    Answers are keyed on the model, a fingerprint of the data the tools read
+    (so a catalog change invalidates them) and the agent inputs. Lookups try
+    the exact inputs first and, with ``normalize``, then the input text with
+    case, punctuation and spacing normalized. A turn that called any of
+    ``side_effect_tools`` (purchases, payments) is never cached, so repeating
+    it always runs the tools again. The executor must be built with
+    ``return_intermediate_steps=True`` so tool calls can be seen.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 1024, normalize: bool = False,
+                 side_effect_tools: Iterable[str] = ()):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.normalize = normalize
+        self.side_effect_tools = set(side_effect_tools)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats = {"hits": 0, "normalized_hits": 0, "misses": 0, "uncacheable": 0, "evictions": 0}
+
+    def make_keys(self, inputs: Dict[str, Any], model: str, fingerprint: str = "") -> List[str]:
+        """Exact key, plus the normalized key when normalization is on"""
+        keys = [self._key(inputs, model, fingerprint)]
+        if self.normalize and isinstance(inputs.get("input"), str):
+            normalized = dict(inputs, input=normalize_prompt(inputs["input"]))
+            keys.append(self._key(normalized, model, fingerprint, "normalized"))
+        return keys
+
+    def get(self, inputs: Dict[str, Any], model: str, fingerprint: str = "") -> Optional[str]:
+        """Return a fresh cached answer, or None"""
+        now = time.time()
+        with self._lock:
+            for i, key in enumerate(self.make_keys(inputs, model, fingerprint)):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                self._stats["normalized_hits" if i else "hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, inputs: Dict[str, Any], model: str, fingerprint: str, output: str):
+        """Cache an answer under its exact and normalized keys"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            for key in self.make_keys(inputs, model, fingerprint):
+                self._entries[key] = (expires_at, output)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invoke(self, executor, inputs: Dict[str, Any], model: str, fingerprint: str = "",
+               run: Optional[Callable[[Any, Dict[str, Any]], Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """``executor.invoke(inputs)``, answered from the cache when possible.
+
+        ``run(executor, inputs)`` replaces ``executor.invoke`` on a miss, e.g. to stream the turn.
+        """
+        output = self.get(inputs, model, fingerprint)
+        if output is not None:
+            return {**inputs, "output": output, "intermediate_steps": [], "cached": True}
+
+        response = run(executor, inputs) if run is not None else executor.invoke(inputs)
+        if self.is_cacheable(response):
+            self.put(inputs, model, fingerprint, response["output"])
+        else:
+            with self._lock:
+                self._stats["uncacheable"] += 1
+        return response
+
+    def is_cacheable(self, response: Dict[str, Any]) -> bool:
+        """Whether a turn's answer can be replayed without re-running its tools"""
+        if "intermediate_steps" not in response:
+            # Cannot tell which tools ran
+            return False
+        return not any(action.tool in self.side_effect_tools for action, _ in response["intermediate_steps"])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            hits = self._stats["hits"] + self._stats["normalized_hits"]
+            lookups = hits + self._stats["misses"]
+            return {**self._stats, "hit_rate": hits / lookups if lookups else 0.0, "entries": len(self._entries)}
+
+    @staticmethod
+    def _key(inputs: Dict[str, Any], model: str, fingerprint: str, kind: str = "exact") -> str:
+        body = json.dumps([kind, model, fingerprint, inputs], sort_keys=True, default=str)
+        return hashlib.sha256(body.encode()).hexdigest()
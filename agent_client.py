@@ -0,0 +1,10 @@
+import asyncio
+import json
+
+async def post(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str, data: dict) -> dict:
+    """One keep-alive JSON POST to the agent server"""
+    body = json.dumps(data).encode()
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    head = (await reader.readuntil(b"\r\n\r\n")).decode()
+    length = int(head.lower().split("content-length: ")[1].split("\r\n")[0])
+    return json.loads(await reader.readexactly(length))
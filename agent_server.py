@@ -0,0 +1,488 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import importlib
+import json
+import logging
+import os
+import re
+import struct
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from agent_streaming import FINAL_ANSWER_MARKER, astream_agent_turn
+from conversation_memory import ConversationMemory
+from idempotency import purchase_scope
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Agent name -> (directory, module) of the agent scripts the server can host
+AGENT_MODULES = {
+    "survey": ("survey", "survey_agent"),
+    "ticket": ("ticket", "ticket_agent"),
+    "ticket_gpt4": ("ticket", "ticket_agent_gpt4"),
+}
+
+# Largest request body or WebSocket message accepted, in bytes
+MAX_BODY_BYTES = 64 * 1024
+
+# Token frames written between drains, so a slow client slows its stream instead of filling memory
+WS_DRAIN_EVERY = 16
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+WS_TEXT, WS_CLOSE, WS_PING, WS_PONG = 0x1, 0x8, 0x9, 0xA
+
+HTTP_STATUS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+ERROR_REPLY = "I apologize, but I encountered an error. Please try again."
+
+class Session:
+    """One customer's conversation with one agent"""
+
+    def __init__(self, agent: str):
+        self.id = uuid.uuid4().hex
+        self.agent = agent
+        # Recent turns verbatim plus a summary of older ones; bounded however long the chat runs
+        self.memory = ConversationMemory()
+        self.last_active = time.monotonic()
+        # One turn at a time per conversation; other sessions run concurrently
+        self.lock = asyncio.Lock()
+
+    def chat_history(self) -> str:
+        return self.memory.render()
+
+    def record(self, question: str, answer: str):
+        self.memory.add(question, answer)
+        self.last_active = time.monotonic()
+
+class AgentService:
+    """Non-blocking front end to one agent module.
+
+    Uses the module's intent router and response cache like its
+    ``chat_with_agent``, but runs the agent with ``ainvoke`` on an executor
+    built from the module's ``build_agent_executor``. LLM turns across all
+    services share ``llm_slots``, which bounds how many run at once. The
+    LLM and executor are built on the first turn that needs them, so routed
+    and cached answers work without the LLM stack installed.
+    """
+
+    def __init__(self, module, llm_slots: asyncio.Semaphore, llm=None):
+        self.module = module
+        self.llm_slots = llm_slots
+        self.llm = llm
+        if llm is None:
+            self.model = module.MODEL_NAME
+        else:
+            self.model = getattr(llm, "model_name", None) or getattr(llm, "model", "")
+        self._executor = None
+        # Function-calling agents stream their answer without a "Final Answer:" marker
+        self.marker = module.answer_marker() if hasattr(module, "answer_marker") else FINAL_ANSWER_MARKER
+
+    @property
+    def executor(self):
+        """The module's agent executor around ``llm`` (the module's own LLM by default)"""
+        if self._executor is None:
+            if self.llm is None:
+                self.llm = self.module.get_llm()
+            self._executor = self.module.build_agent_executor(self.llm, verbose=False)
+        return self._executor
+
+    async def reply(self, session: Session, text: str, on_token: Optional[Callable[[str], None]] = None,
+                    drain: Optional[Callable[[], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Answer one message; ``on_token`` receives the answer as it streams"""
+        # Purchases are idempotent per session; to_thread and the agent's tools inherit the scope
+        with purchase_scope(session.id):
+            return await self._reply(session, text, on_token, drain)
+
+    async def _reply(self, session: Session, text: str, on_token: Optional[Callable[[str], None]],
+                     drain: Optional[Callable[[], Awaitable[None]]]) -> Dict[str, Any]:
+        # Router handlers can block (payments, API calls), so keep them off the event loop
+        routed = await asyncio.to_thread(self.module.intent_router.route, text)
+        if routed is not None:
+            return {"reply": routed, "source": "router"}
+
+        cache = self.module.response_cache
+        inputs = {"input": text, "chat_history": session.chat_history()}
+        fingerprint = self.module.cache_fingerprint()
+        cached = cache.get(inputs, self.model, fingerprint)
+        if cached is not None:
+            return {"reply": cached, "source": "cache"}
+
+        async with self.llm_slots:
+            with self.module.prompt_budget.turn() as usage:
+                if on_token is not None:
+                    response = await astream_agent_turn(self.executor, inputs, on_token, marker=self.marker,
+                                                        drain=drain)
+                else:
+                    response = await self.executor.ainvoke(inputs)
+
+        if cache.is_cacheable(response):
+            cache.put(inputs, self.model, fingerprint, response["output"])
+        return {"reply": response["output"], "source": "agent", "usage": usage.as_dict()}
+
+class AgentServer:
+    """asyncio HTTP + WebSocket server running many conversations at once.
+
+    HTTP:
+      POST   /sessions                  {"agent": "survey"} -> {"session_id": ...}
+      POST   /sessions/<id>/messages    {"message": "..."}  -> {"reply": ..., "source": ..., "usage": ...}
+      DELETE /sessions/<id>
+      GET    /health
+    WebSocket:
+      GET /ws?agent=survey[&session_id=...] then send messages as text
+      frames; replies stream back as {"type": "token"} frames followed by
+      one {"type": "reply"} frame.
+
+    Sessions idle for ``session_ttl`` seconds, or the least recently used
+    beyond ``max_sessions``, are dropped.
+    """
+
+    def __init__(self, services: Dict[str, AgentService], max_sessions: int = 10000, session_ttl: float = 1800):
+        self.services = services
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stats = {"messages": 0, "errors": 0}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> int:
+        """Start listening; returns the bound port (useful with port 0)"""
+        self._server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_BODY_BYTES)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def create_session(self, agent: str) -> Session:
+        if agent not in self.services:
+            raise KeyError(agent)
+        self._evict()
+        session = Session(agent)
+        self.sessions[session.id] = session
+        return session
+
+    def get_session(self, session_id: str) -> Optional[Session]:
+        session = self.sessions.get(session_id)
+        if session is not None:
+            self.sessions.move_to_end(session_id)
+            session.last_active = time.monotonic()
+        return session
+
+    async def chat(self, session: Session, text: str, on_token: Optional[Callable[[str], None]] = None,
+                   drain: Optional[Callable[[], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Run one turn of a session's conversation"""
+        async with session.lock:
+            self._stats["messages"] += 1
+            try:
+                result = await self.services[session.agent].reply(session, text, on_token, drain)
+            except Exception as e:
+                logger.exception(f"Error answering session {session.id}: {e}")
+                self._stats["errors"] += 1
+                return {"reply": ERROR_REPLY, "source": "error"}
+            session.record(text, result["reply"])
+            return result
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "agents": list(self.services),
+            "sessions": len(self.sessions),
+            "tokens": {name: service.module.prompt_budget.stats() for name, service in self.services.items()},
+            **self._stats,
+        }
+
+    def _evict(self):
+        now = time.monotonic()
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if len(self.sessions) < self.max_sessions and now - session.last_active < self.session_ttl:
+                break
+            del self.sessions[session.id]
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        upgraded = False
+        try:
+            # HTTP/1.1 keep-alive: serve requests until the client closes
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                if headers.get("upgrade", "").lower() == "websocket":
+                    upgraded = True
+                    await self._handle_websocket(target, headers, reader, writer)
+                    break
+                status, payload = await self._handle_http(method, target, body)
+                _write_response(writer, status, payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ValueError as e:
+            if not upgraded:
+                _write_response(writer, 413 if "too large" in str(e) else 400, {"error": str(e)})
+        finally:
+            writer.close()
+
+    async def _handle_http(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        path = urlsplit(target).path.rstrip("/")
+        try:
+            data = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            return 400, {"error": "Body must be JSON"}
+
+        if path == "/health" and method == "GET":
+            return 200, self.health()
+
+        if path == "/sessions":
+            if method != "POST":
+                return 405, {"error": "Use POST"}
+            agent = data.get("agent", next(iter(self.services)))
+            try:
+                session = self.create_session(agent)
+            except KeyError:
+                return 400, {"error": f"Unknown agent {agent}; available: {', '.join(self.services)}"}
+            return 201, {"session_id": session.id, "agent": session.agent}
+
+        match = re.fullmatch(r"/sessions/([0-9a-f]+)(/messages)?", path)
+        if match is None:
+            return 404, {"error": "Not found"}
+        session = self.get_session(match.group(1))
+        if session is None:
+            return 404, {"error": "Unknown or expired session"}
+
+        if match.group(2):
+            if method != "POST":
+                return 405, {"error": "Use POST"}
+            message = data.get("message")
+            if not isinstance(message, str) or not message.strip():
+                return 400, {"error": "Body must be {\"message\": \"...\"}"}
+            return 200, {"session_id": session.id, **await self.chat(session, message)}
+
+        if method == "DELETE":
+            del self.sessions[session.id]
+            return 204, None
+        return 200, {"session_id": session.id, "agent": session.agent, "turns": session.memory.turn_count}
+
+    async def _handle_websocket(self, target: str, headers: Dict[str, str],
+                                reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        query = parse_qs(urlsplit(target).query)
+        session = self.get_session(query.get("session_id", [""])[0])
+        if session is None:
+            agent = query.get("agent", [next(iter(self.services))])[0]
+            try:
+                session = self.create_session(agent)
+            except KeyError:
+                _write_response(writer, 400, {"error": f"Unknown agent {agent}"})
+                return
+
+        accept = base64.b64encode(hashlib.sha1((headers["sec-websocket-key"] + WEBSOCKET_GUID).encode()).digest())
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+        _write_frame(writer, WS_TEXT, json.dumps({"type": "session", "session_id": session.id, "agent": session.agent}))
+        await writer.drain()
+
+        while True:
+            opcode, payload = await _read_frame(reader)
+            if opcode == WS_CLOSE:
+                _write_frame(writer, WS_CLOSE, payload[:2])
+                await writer.drain()
+                return
+            if opcode == WS_PING:
+                _write_frame(writer, WS_PONG, payload)
+                await writer.drain()
+                continue
+            if opcode != WS_TEXT:
+                continue
+
+            text = payload.decode("utf-8", errors="replace")
+            try:
+                message = json.loads(text).get("message", "")
+            except (json.JSONDecodeError, AttributeError):
+                message = text
+            if not message.strip():
+                continue
+
+            pending_frames = 0
+
+            def on_token(token: str):
+                nonlocal pending_frames
+                _write_frame(writer, WS_TEXT, json.dumps({"type": "token", "text": token}))
+                pending_frames += 1
+
+            async def drain():
+                nonlocal pending_frames
+                if pending_frames >= WS_DRAIN_EVERY:
+                    pending_frames = 0
+                    await writer.drain()
+
+            result = await self.chat(session, message, on_token, drain)
+            _write_frame(writer, WS_TEXT, json.dumps({"type": "reply", **result}))
+            await writer.drain()
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Read one HTTP request, or None if the connection closed between requests"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise
+    except asyncio.LimitOverrunError:
+        raise ValueError("Request headers too large")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _ = lines[0].split(" ", 2)
+    except ValueError:
+        raise ValueError("Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_BODY_BYTES:
+        raise ValueError("Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+def _write_response(writer: asyncio.StreamWriter, status: int, payload: Any):
+    body = b"" if payload is None else json.dumps(payload).encode()
+    head = f"HTTP/1.1 {status} {HTTP_STATUS.get(status, '')}\r\nContent-Length: {len(body)}\r\n"
+    if body:
+        head += "Content-Type: application/json\r\n"
+    writer.write(head.encode() + b"\r\n" + body)
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[int, bytes]:
+    """Read one WebSocket message, joining fragments"""
+    message = b""
+    message_opcode = None
+    while True:
+        first, second = await reader.readexactly(2)
+        fin, opcode = first & 0x80, first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await reader.readexactly(8))[0]
+        if length > MAX_BODY_BYTES:
+            raise ValueError("WebSocket message too large")
+        mask = await reader.readexactly(4) if second & 0x80 else None
+        payload = await reader.readexactly(length)
+        if mask is not None:
+            payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+        # Control frames can arrive between the fragments of a message
+        if opcode >= 0x8:
+            return opcode, payload
+        if opcode:
+            message_opcode = opcode
+        message += payload
+        if fin:
+            return message_opcode, message
+
+def _write_frame(writer: asyncio.StreamWriter, opcode: int, payload):
+    if isinstance(payload, str):
+        payload = payload.encode()
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    writer.write(header + payload)
+
+def load_agent_module(agent: str):
+    """Import one of the agent scripts by name"""
+    directory, module_name = AGENT_MODULES[agent]
+    # The agent scripts import their neighbours by bare module name
+    path = os.path.join(ROOT_DIR, directory)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(module_name)
+
+def build_fake_llm(latency: float = 0.5):
+    """Chat model that waits ``latency`` seconds and answers directly, for local load tests"""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class FakeAgentLLM(BaseChatModel):
+        latency: float = 0.5
+        model_name: str = "fake-agent"
+
+        @property
+        def _llm_type(self) -> str:
+            return "fake-agent"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            time.sleep(self.latency)
+            return self._result(messages)
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            await asyncio.sleep(self.latency)
+            return self._result(messages)
+
+        @staticmethod
+        def _result(messages) -> ChatResult:
+            questions = re.findall(r"(?:Human|Question): (.*)", str(messages[-1].content))
+            question = questions[-1].strip() if questions else ""
+            text = f"Thought: I can answer this directly\nFinal Answer: (fake) You asked: {question}"
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    return FakeAgentLLM(latency=latency)
+
+def build_server(agents: List[str], max_llm_calls: int = 32, fake_latency: Optional[float] = None,
+                 **server_options) -> AgentServer:
+    """Load the agents and wrap them in a server; ``fake_latency`` swaps in the fake LLM"""
+    llm_slots = asyncio.Semaphore(max_llm_calls)
+    services = {}
+    for agent in agents:
+        module = load_agent_module(agent)
+        llm = build_fake_llm(fake_latency) if fake_latency is not None else None
+        services[agent] = AgentService(module, llm_slots, llm)
+    return AgentServer(services, **server_options)
+
+async def async_main(args):
+    server = build_server(args.agents.split(","), args.max_llm_calls,
+                          args.fake_latency if args.fake_llm else None, max_sessions=args.max_sessions)
+    port = await server.start(args.host, args.port)
+    logger.info(f"Serving {', '.join(server.services)} on http://{args.host}:{port}")
+    await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the survey and ticket agents over HTTP and WebSocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--agents", default="survey,ticket_gpt4", help="Comma-separated: " + ", ".join(AGENT_MODULES))
+    parser.add_argument("--max-llm-calls", type=int, default=32, help="LLM turns allowed to run at once")
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--fake-llm", action="store_true", help="Use a local fake LLM instead of the real APIs")
+    parser.add_argument("--fake-latency", type=float, default=0.5, help="Seconds each fake LLM call takes")
+    args = parser.parse_args()
+    asyncio.run(async_main(args))
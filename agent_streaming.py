@@ -0,0 +1,136 @@
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# ReAct agents put the answer for the user after this marker
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+# Longest tool input/output echoed while streaming
+MAX_ECHO_CHARS = 200
+
+class _FinalAnswerFilter:
+    """Passes on only the text after ``marker`` in each LLM call's stream; all of it without a marker"""
+
+    def __init__(self, on_token: Callable[[str], None], marker: Optional[str] = FINAL_ANSWER_MARKER):
+        self.on_token = on_token
+        self.marker = marker
+        self.emitted = False
+        self._buffers: Dict[str, str] = {}
+        self._sent: Dict[str, int] = {}
+
+    def feed(self, run_id: str, text: str):
+        if self.marker is None:
+            self.emitted = True
+            self.on_token(text)
+            return
+        buffer = self._buffers[run_id] = self._buffers.get(run_id, "") + text
+        start = buffer.find(self.marker)
+        if start < 0:
+            return
+        answer = buffer[start + len(self.marker):].lstrip()
+        sent = self._sent.get(run_id, 0)
+        if len(answer) > sent:
+            self._sent[run_id] = len(answer)
+            self.emitted = True
+            self.on_token(answer[sent:])
+
+async def astream_agent_turn(executor, inputs: Dict[str, Any], on_token: Callable[[str], None],
+                             on_action: Optional[Callable[[str, Any], None]] = None,
+                             on_observation: Optional[Callable[[str, Any], None]] = None,
+                             marker: Optional[str] = FINAL_ANSWER_MARKER,
+                             drain: Optional[Callable[[], Awaitable[None]]] = None) -> Dict[str, Any]:
+    """Run one agent turn, passing final-answer tokens and tool calls on as they happen.
+
+    Returns the executor's usual result dict. If the answer never streamed
+    (no "Final Answer:" marker, e.g. the agent hit its iteration limit) the
+    whole output is passed to ``on_token`` at the end. Tool-calling agents
+    have no marker, as any text the model writes is the answer; pass
+    ``marker=None`` for them. ``drain`` is awaited after each streamed
+    chunk, so a caller writing tokens to a socket can apply backpressure.
+    """
+    answer = _FinalAnswerFilter(on_token, marker)
+    root_run_id = None
+    result: Dict[str, Any] = {}
+
+    async for event in executor.astream_events(inputs, version="v1"):
+        kind = event["event"]
+        if root_run_id is None:
+            root_run_id = event["run_id"]
+
+        if kind == "on_chat_model_stream":
+            chunk = event["data"].get("chunk")
+            content = getattr(chunk, "content", chunk)
+            if isinstance(content, str) and content:
+                answer.feed(event["run_id"], content)
+                if drain is not None:
+                    await drain()
+        elif kind == "on_tool_start" and on_action is not None:
+            on_action(event["name"], event["data"].get("input"))
+        elif kind == "on_tool_end" and on_observation is not None:
+            on_observation(event["name"], event["data"].get("output"))
+        elif kind == "on_chain_end" and event["run_id"] == root_run_id:
+            result = event["data"].get("output") or {}
+
+    if not answer.emitted and result.get("output"):
+        on_token(result["output"])
+    return result
+
+def stream_agent_turn(executor, inputs: Dict[str, Any], on_token: Callable[[str], None],
+                      on_action: Optional[Callable[[str, Any], None]] = None,
+                      on_observation: Optional[Callable[[str, Any], None]] = None,
+                      marker: Optional[str] = FINAL_ANSWER_MARKER) -> Dict[str, Any]:
+    """Blocking ``astream_agent_turn`` for synchronous callers"""
+    # asyncio is slow to import and only needed once a turn streams
+    import asyncio
+    return asyncio.run(astream_agent_turn(executor, inputs, on_token, on_action, on_observation, marker))
+
+class TurnPrinter:
+    """Prints a streamed turn to the terminal and times its first token.
+
+    Pass the instance as ``on_token`` and its ``action``/``observation``
+    methods as the tool callbacks; call ``finish`` when the turn is done to
+    print the time to first token, total time and any token usage.
+    """
+
+    def __init__(self, prefix: str = "\nAssistant: ", out=None):
+        self.prefix = prefix
+        self.out = out or sys.stdout
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.tokens: List[str] = []
+        # Token usage of the turn, set by the agent when the LLM ran
+        self.usage = None
+
+    def __call__(self, text: str):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            self.out.write(self.prefix)
+        self.tokens.append(text)
+        self.out.write(text)
+        self.out.flush()
+
+    def action(self, tool: str, tool_input: Any):
+        self.out.write(f"\n  [{tool}] {_shorten(tool_input)}")
+        self.out.flush()
+
+    def observation(self, tool: str, output: Any):
+        self.out.write(f"\n  [{tool} ->] {_shorten(output)}")
+        self.out.flush()
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started
+
+    def finish(self):
+        total = time.perf_counter() - self.started
+        first = self.time_to_first_token
+        first_text = f"{first:.2f}s" if first is not None else "n/a"
+        usage_text = f", {self.usage}" if self.usage is not None and self.usage.llm_calls else ""
+        self.out.write(f"\n  (first token {first_text}, total {total:.2f}s{usage_text})\n")
+        self.out.flush()
+
+def _shorten(value: Any) -> str:
+    text = " ".join(str(value).split())
+    return text if len(text) <= MAX_ECHO_CHARS else text[:MAX_ECHO_CHARS - 3] + "..."
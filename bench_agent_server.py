@@ -0,0 +1,48 @@
+import asyncio
+import sys
+import time
+from agent_client import post
+from agent_server import build_server
+
+async def shopper(port: int, agent: str, index: int, turns: int) -> list:
+    """One customer: open a session and send ``turns`` messages the router cannot answer"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        session_id = (await post(reader, writer, "/sessions", {"agent": agent}))["session_id"]
+        latencies = []
+        for turn in range(turns):
+            start = time.perf_counter()
+            await post(reader, writer, f"/sessions/{session_id}/messages",
+                       {"message": f"Any good shows for shopper {index}, question {turn}?"})
+            latencies.append(time.perf_counter() - start)
+        return latencies
+    finally:
+        writer.close()
+
+async def bench(agent: str, shoppers: int, turns: int, latency: float, max_llm_calls: int):
+    server = build_server([agent], max_llm_calls=max_llm_calls, fake_latency=latency)
+    port = await server.start(port=0)
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*[shopper(port, agent, i, turns) for i in range(shoppers)])
+        elapsed = time.perf_counter() - start
+    finally:
+        await server.close()
+
+    latencies = sorted(value for result in results for value in result)
+    serial = shoppers * turns * latency
+    print(f"Agent server benchmark: {agent}, {shoppers} shoppers x {turns} turns, "
+          f"fake LLM {latency * 1000:.0f} ms/call, {max_llm_calls} concurrent LLM calls")
+    print(f"wall time:       {elapsed:.2f} s (one input() loop: ~{serial:.0f} s)")
+    print(f"throughput:      {len(latencies) / elapsed:.0f} turns/s")
+    print(f"latency p50/p95: {latencies[len(latencies) // 2] * 1000:.0f} / "
+          f"{latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms")
+
+def main():
+    shoppers = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    agent = sys.argv[2] if len(sys.argv) > 2 else "survey"
+
+    asyncio.run(bench(agent, shoppers, turns=3, latency=0.5, max_llm_calls=shoppers))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (directory, module) pairs timed from a fresh interpreter
+MODULES = [
+    ("survey", "survey_agent"),
+    ("ticket", "ticket_data"),
+    ("ticket", "ticket_agent"),
+    ("ticket", "ticket_agent_gpt4"),
+    (".", "agent_server"),
+]
+
+# Slowest imports listed under each module
+TOP_OFFENDERS = 5
+
+def import_times(directory: str, module: str) -> Tuple[float, List[Tuple[float, str]], str]:
+    """Cold import of ``module``: total ms, the slowest top-level imports and any error"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.join(ROOT_DIR, directory), capture_output=True, text=True
+    )
+
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    # and a module's own imports are printed, one level deeper, just before it
+    total = 0.0
+    children: List[Tuple[float, str]] = []
+    top_level: List[Tuple[float, str]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        ms = int(cumulative_us) / 1000
+        if depth == 3:
+            children.append((ms, name.strip()))
+        elif depth == 1:
+            # Imports made at interpreter startup belong to other top-level modules
+            if name.strip() == module:
+                total, top_level = ms, children
+            children = []
+
+    error = result.stderr.strip().splitlines()[-1] if result.returncode else ""
+    return total, sorted(top_level, reverse=True)[:TOP_OFFENDERS], error
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"Cold import times, best of {runs} fresh interpreters")
+    for directory, module in MODULES:
+        best = None
+        for _ in range(runs):
+            measured = import_times(directory, module)
+            if best is None or measured[0] < best[0]:
+                best = measured
+        total, offenders, error = best
+        if error:
+            print(f"\n{module}: failed to import ({error})")
+            continue
+        print(f"\n{module}: {total:.1f} ms")
+        for ms, name in offenders:
+            print(f"  {ms:8.1f} ms  {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+import time
+from payment_dispatcher import PaymentDispatcher
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_PATH = os.path.join(ROOT_DIR, 'main.py')
+
+def bench_subprocess(runs: int) -> float:
+    """Average seconds per payment when launching main.py as a subprocess"""
+    start = time.perf_counter()
+    for _ in range(runs):
+        subprocess.run([sys.executable, MAIN_PATH], capture_output=True, text=True)
+    return (time.perf_counter() - start) / runs
+
+def bench_in_process(runs: int) -> float:
+    """Average seconds per payment through the in-process dispatcher"""
+    dispatcher = PaymentDispatcher()
+    try:
+        dispatcher.dispatch()  # warm up the worker pool
+        start = time.perf_counter()
+        for _ in range(runs):
+            dispatcher.dispatch()
+        return (time.perf_counter() - start) / runs
+    finally:
+        dispatcher.shutdown()
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+    # Measure only the dispatch overhead, not an on-chain transfer
+    os.environ.pop('SOLANA_SENDER_PRIVATE_KEY', None)
+    os.environ.pop('SOLANA_RECIPIENT_ADDRESS', None)
+
+    subprocess_time = bench_subprocess(runs)
+    in_process_time = bench_in_process(runs)
+
+    print(f"Payment dispatch benchmark ({runs} runs)")
+    print(f"subprocess main.py: {subprocess_time * 1000:.2f} ms/payment")
+    print(f"in-process:         {in_process_time * 1000:.3f} ms/payment")
+    print(f"speedup:            {subprocess_time / in_process_time:.0f}x")
+
+if __name__ == "__main__":
+    main()
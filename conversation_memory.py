@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prompt_budget import count_tokens, truncate_tokens
+
+# Longest question or answer kept per turn, and longest summary, in tokens
+MAX_TURN_TOKENS = 300
+MAX_SUMMARY_TOKENS = 400
+
+# Characters of a folded turn kept in the default summary
+SUMMARY_QUESTION_CHARS = 120
+SUMMARY_ANSWER_CHARS = 200
+
+Summarizer = Callable[[str, List[Tuple[str, str]]], str]
+
+def extractive_summary(summary: str, turns: List[Tuple[str, str]]) -> str:
+    """Default summarizer: one line per folded turn, no LLM call"""
+    lines = [summary] if summary else []
+    for question, answer in turns:
+        # The first line of an answer usually carries its point (selection, order, result)
+        first_line = next((line.strip() for line in answer.splitlines() if line.strip()), "")
+        lines.append(f"- User: {_clip(question, SUMMARY_QUESTION_CHARS)} -> "
+                     f"Assistant: {_clip(first_line, SUMMARY_ANSWER_CHARS)}")
+    return "\n".join(lines)
+
+def llm_summarizer(llm) -> Summarizer:
+    """Summarizer that asks ``llm`` to fold turns into the running summary"""
+    def summarize(summary: str, turns: List[Tuple[str, str]]) -> str:
+        transcript = "\n".join(f"Human: {question}\nAssistant: {answer}" for question, answer in turns)
+        prompt = (
+            "Update the summary of a concert booking conversation with the new lines. Keep the "
+            "user's preferences, the events, IDs, sections, prices and orders mentioned, and "
+            "drop small talk. Reply with the summary only.\n\n"
+            f"Current summary:\n{summary or '(empty)'}\n\nNew lines:\n{transcript}\n\nNew summary:"
+        )
+        response = llm.invoke(prompt)
+        return getattr(response, "content", str(response)).strip()
+    return summarize
+
+class ConversationMemory:
+    """Chat history for one conversation: recent turns verbatim, older ones summarized.
+
+    The last ``window_turns`` turns are kept as they were said, each side
+    cut to ``max_turn_tokens``. When the window overflows, its oldest
+    ``fold_turns`` turns are folded into a running summary by ``summarizer``
+    (``extractive_summary`` unless another is given, e.g. ``llm_summarizer``),
+    and the summary is capped at ``max_summary_tokens``, so the rendered
+    history stays bounded however long the conversation runs.
+    """
+
+    def __init__(self, window_turns: int = 6, fold_turns: int = 2, max_turn_tokens: int = MAX_TURN_TOKENS,
+                 max_summary_tokens: int = MAX_SUMMARY_TOKENS, summarizer: Optional[Summarizer] = None):
+        self.window_turns = window_turns
+        self.fold_turns = max(1, min(fold_turns, window_turns))
+        self.max_turn_tokens = max_turn_tokens
+        self.max_summary_tokens = max_summary_tokens
+        self.summarizer = summarizer or extractive_summary
+
+        self.turns: "deque[Tuple[str, str]]" = deque()
+        self.summary = ""
+        self.turn_count = 0
+        self.last_active = time.monotonic()
+
+    def add(self, question: str, answer: str):
+        """Record a finished turn"""
+        self.turns.append((truncate_tokens(question, self.max_turn_tokens),
+                           truncate_tokens(answer, self.max_turn_tokens)))
+        self.turn_count += 1
+        self.last_active = time.monotonic()
+
+        if len(self.turns) > self.window_turns:
+            folded = [self.turns.popleft() for _ in range(self.fold_turns)]
+            self.summary = self._cap_summary(self.summarizer(self.summary, folded))
+
+    def render(self) -> str:
+        """The history as prompt text for the agent's {chat_history}"""
+        parts = []
+        if self.summary:
+            parts.append(f"Summary of the earlier conversation:\n{self.summary}")
+        parts.extend(f"Human: {question}\nAssistant: {answer}" for question, answer in self.turns)
+        return "\n".join(parts)
+
+    def messages(self) -> List[Tuple[str, str]]:
+        """Recent turns as (question, answer) pairs"""
+        return list(self.turns)
+
+    def clear(self):
+        self.turns.clear()
+        self.summary = ""
+
+    def _cap_summary(self, summary: str) -> str:
+        # Drop the oldest summary lines first; cut the text only if one line is still too long
+        lines = summary.splitlines()
+        while len(lines) > 1 and count_tokens("\n".join(lines)) > self.max_summary_tokens:
+            lines.pop(0)
+        return truncate_tokens("\n".join(lines), self.max_summary_tokens)
+
+class SessionMemoryStore:
+    """Bounded map of session ID -> ConversationMemory.
+
+    Sessions idle for ``idle_ttl`` seconds, or the least recently used
+    beyond ``max_sessions``, are dropped. Keyword arguments are passed on to
+    each new ``ConversationMemory``.
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl: float = 1800, **memory_options: Any):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.memory_options = memory_options
+
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self._stats = {"created": 0, "evicted": 0}
+
+    def get(self, session_id: str) -> ConversationMemory:
+        """The session's memory, created on first use"""
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = self._sessions[session_id] = ConversationMemory(**self.memory_options)
+                self._stats["created"] += 1
+            else:
+                memory.last_active = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self._evict(keep=session_id)
+            return memory
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "sessions": len(self._sessions)}
+
+    def _evict(self, keep: str):
+        now = time.monotonic()
+        while self._sessions:
+            session_id, memory = next(iter(self._sessions.items()))
+            if session_id == keep:
+                break
+            if len(self._sessions) <= self.max_sessions and now - memory.last_active < self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            self._stats["evicted"] += 1
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 3] + "..."
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+# Conversation the purchases of the running turn belong to; set with ``purchase_scope``
+_purchase_scope: ContextVar[Optional[str]] = ContextVar("purchase_scope", default=None)
+
+PURCHASE_KEY_FIELDS = ("event_id", "section", "quantity", "total_price")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+@contextmanager
+def purchase_scope(scope: str) -> Iterator[None]:
+    """Key the purchases made inside the block on ``scope``, a stable conversation ID"""
+    token = _purchase_scope.set(scope)
+    try:
+        yield
+    finally:
+        _purchase_scope.reset(token)
+
+def purchase_key(ticket_info: Union[Dict[str, Any], str], scope: Optional[str] = None) -> str:
+    """Idempotency key for an order.
+
+    An ``order_id`` in the order is the key on its own, so a client that
+    retries with it after a crash or restart gets the first result back.
+    Otherwise the order's event_id/section/quantity/total_price are hashed
+    with ``scope`` (by default the current ``purchase_scope``): repeats within
+    one conversation pay once, while other conversations placing the same
+    order pay for their own.
+    """
+    if isinstance(ticket_info, str):
+        try:
+            ticket_info = json.loads(ticket_info)
+        except json.JSONDecodeError:
+            pass
+    if isinstance(ticket_info, dict) and ticket_info.get("order_id") not in (None, ""):
+        return hashlib.sha256(json.dumps(["order", str(ticket_info["order_id"])]).encode()).hexdigest()
+
+    scope = scope if scope is not None else _purchase_scope.get()
+    if scope is None:
+        raise ValueError("A purchase needs an order_id or a purchase scope")
+    if isinstance(ticket_info, dict):
+        fields = [_normalize(ticket_info.get(field)) for field in PURCHASE_KEY_FIELDS]
+    else:
+        fields = [" ".join(str(ticket_info).split())]
+    return hashlib.sha256(json.dumps(["scope", scope] + fields).encode()).hexdigest()
+
+def _normalize(value: Any) -> str:
+    # 2, "2" and 2.0 name the same order
+    try:
+        return f"{float(value):.2f}"
+    except (TypeError, ValueError):
+        return str(value).strip().lower()
+
+class IdempotencyCache:
+    """Remembers the result of each completed operation by idempotency key.
+
+    Results live in an in-memory LRU map with a TTL, written through to a
+    local SQLite table so they survive restarts. ``get_or_run`` also joins
+    concurrent calls with the same key, so the operation runs at most once.
+    Failed operations (exceptions) are not cached and can be retried.
+    ``get_or_settle`` is for operations whose outcome is only known later,
+    e.g. a payment still settling: their provisional result is replaced by
+    the final one, or dropped so the operation can be retried.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 3600.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached result for ``key`` if it has not expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT result, expires_at FROM idempotency WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0], row[1])
+            return row[0]
+
+    def put(self, key: str, result: str):
+        """Cache a completed operation's result"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, result, expires_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO idempotency (key, result, expires_at) VALUES (?, ?, ?)",
+                    (key, result, expires_at)
+                )
+
+    def discard(self, key: str):
+        """Forget a cached result, so the operation can run again"""
+        with self._lock:
+            self._entries.pop(key, None)
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM idempotency WHERE key = ?", (key,))
+
+    def get_or_settle(self, key: str, operation: Callable[[], Tuple[str, Optional[Future]]]) -> str:
+        """``get_or_run`` for an operation returning (result, final).
+
+        ``result`` is cached at once. When ``final`` resolves it replaces
+        ``result``, or, if it resolves to None or fails, the entry is
+        dropped so the operation can be retried.
+        """
+        finals = []
+
+        def run() -> str:
+            result, final = operation()
+            if final is not None:
+                finals.append(final)
+            return result
+
+        result = self.get_or_run(key, run)
+        # Registered after get_or_run cached the provisional result, so the final one always wins
+        for final in finals:
+            final.add_done_callback(lambda future: self._settle(key, future))
+        return result
+
+    def _settle(self, key: str, final: Future):
+        result = final.result() if final.exception() is None else None
+        if result is None:
+            self.discard(key)
+        else:
+            self.put(key, result)
+
+    def get_or_run(self, key: str, operation: Callable[[], str]) -> str:
+        """Return the cached result for ``key`` or run ``operation`` exactly once"""
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+
+        if not owner:
+            # Someone else is already running this operation
+            return future.result()
+
+        try:
+            result = operation()
+            self.put(key, result)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def purge(self) -> int:
+        """Drop expired entries from memory and the store; return how many were in memory"""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM idempotency WHERE expires_at <= ?", (now,))
+        return len(expired)
+
+    def _remember(self, key: str, result: str, expires_at: float):
+        self._entries[key] = (expires_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+_purchase_cache: Optional[IdempotencyCache] = None
+_purchase_cache_lock = threading.Lock()
+
+def get_purchase_cache() -> IdempotencyCache:
+    """Return the process-wide purchase cache, stored alongside the payment queue"""
+    global _purchase_cache
+    with _purchase_cache_lock:
+        if _purchase_cache is None:
+            from payment_dispatcher import PAYMENT_QUEUE_PATH
+            _purchase_cache = IdempotencyCache(PAYMENT_QUEUE_PATH)
+        return _purchase_cache
@@ -0,0 +1,99 @@
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Union
+
+# Inputs that mean "show me everything", e.g. "list", "show all concerts", "events"
+LIST_PATTERN = re.compile(
+    r"(?:(?:list|show)(?: me)?(?: all)?(?: the)? )?(?:concerts|events|tickets|shows)[.!?]?|list|list all|show all",
+    re.IGNORECASE
+)
+
+# Explicit event lookups, e.g. "event 2", "event #2", "event id: 2", "details for event 2".
+# A bare "2" is not one: mid-purchase it is usually a quantity or a choice
+EVENT_ID_PATTERN = re.compile(
+    r"(?:(?:show|get)(?: me)? )?(?:(?:the )?details (?:for|of|on) )?event(?: id)?\s*[:#]?\s*([\w-]+)[.!?]?",
+    re.IGNORECASE
+)
+
+class IntentRouter:
+    """Rule-based fast path that answers unambiguous inputs without the LLM.
+
+    Rules are tried in the order they were added. A regex rule matches when
+    the whole (stripped) input matches and its optional ``when`` check
+    accepts the groups; a JSON rule matches a JSON object
+    carrying every required field; a predicate rule matches when its check
+    returns True. The first matching rule's handler answers the input, and
+    ``route`` returns None when nothing matches so the caller falls back to
+    the agent.
+    """
+
+    def __init__(self):
+        self._rules: List[tuple] = []
+        self._lock = threading.Lock()
+        self._stats = {"routed": 0, "fallthrough": 0}
+
+    def add(self, name: str, pattern: Union[str, Pattern], handler: Callable[..., str],
+            when: Optional[Callable[..., bool]] = None):
+        """Answer inputs fully matching ``pattern`` (and ``when(*groups)``, if given) with ``handler(*groups)``"""
+        pattern = re.compile(pattern, re.IGNORECASE) if isinstance(pattern, str) else pattern
+        self._rules.append((name, self._match_regex(pattern, when), handler))
+
+    def add_json(self, name: str, required_fields: Iterable[str], handler: Callable[[Dict[str, Any]], str]):
+        """Answer JSON objects carrying every ``required_fields`` with ``handler(obj)``"""
+        self._rules.append((name, self._match_json(tuple(required_fields)), handler))
+
+    def add_predicate(self, name: str, check: Callable[[str], bool], handler: Callable[[str], str]):
+        """Answer inputs for which ``check(text)`` is True with ``handler(text)``"""
+        self._rules.append((name, lambda text: (text,) if check(text) else None, handler))
+
+    def route(self, text: str) -> Optional[str]:
+        """The answer of the first matching rule, or None to fall back to the agent"""
+        text = text.strip()
+        for _, match, handler in self._rules:
+            args = match(text)
+            if args is not None:
+                self._count("routed")
+                return handler(*args)
+        self._count("fallthrough")
+        return None
+
+    def match(self, text: str) -> Optional[str]:
+        """Name of the rule that would answer ``text``, without running it"""
+        text = text.strip()
+        for name, match, _ in self._rules:
+            if match(text) is not None:
+                return name
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, outcome: str):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    @staticmethod
+    def _match_regex(pattern: Pattern, when: Optional[Callable[..., bool]] = None):
+        def match(text: str):
+            found = pattern.fullmatch(text)
+            if found is None or (when is not None and not when(*found.groups())):
+                return None
+            return found.groups()
+        return match
+
+    @staticmethod
+    def _match_json(required_fields: tuple):
+        def match(text: str):
+            # Cheap check before parsing
+            if not text.startswith("{"):
+                return None
+            try:
+                value = json.loads(text)
+            except json.JSONDecodeError:
+                return None
+            if isinstance(value, dict) and all(field in value for field in required_fields):
+                return (value,)
+            return None
+        return match
@@ -1,5 +1,9 @@
+def process_payment() -> str:
+    """Run the payment process and return its status message"""
+    return "[FUNCTION CALL TO PAYMENT PROCESS]"
+
 def main():
-    print("[FUNCTION CALL TO PAYMENT PROCESS]")
+    print(process_payment())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,110 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+import main
+
+# Amount sent on-chain when the payment info does not specify one
+DEFAULT_AMOUNT_IN_SOL = 0.01
+
+# Durable payment queue database, next to main.py unless overridden
+PAYMENT_QUEUE_PATH = os.getenv(
+    'PAYMENT_QUEUE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'payments.db')
+)
+
+class PaymentDispatcher:
+    """Runs payments in-process on a reusable worker pool.
+
+    Replaces launching ``python main.py`` per purchase: the payment process
+    is called directly, and when SOLANA_SENDER_PRIVATE_KEY and
+    SOLANA_RECIPIENT_ADDRESS are set the transfer is written to the durable
+    PaymentQueue, whose workers settle it through SolanaTransactionNode.
+    ``dispatch_settled`` also returns a Future for that settlement, so
+    callers can act on the transfer's outcome rather than on its queueing.
+    """
+
+    def __init__(self, max_workers: int = 4, rpc_url: Optional[str] = None):
+        self.rpc_url = rpc_url
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="payment")
+        self._queue = None
+        self._queue_lock = threading.Lock()
+
+    def submit(self, payment_info: Optional[Dict[str, Any]] = None) -> Future:
+        """Queue a payment on the worker pool; resolves to (message, settlement or None)"""
+        return self._executor.submit(self._process, payment_info or {})
+
+    def dispatch(self, payment_info: Optional[Dict[str, Any]] = None) -> str:
+        """Process a payment and wait for its status message"""
+        return self.submit(payment_info).result()[0]
+
+    def dispatch_settled(self, payment_info: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[Future]]:
+        """Process a payment; return its status message and, for an on-chain
+        transfer, a Future resolving to whether the transfer confirmed"""
+        return self.submit(payment_info).result()
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+        if self._queue is not None:
+            self._queue.stop()
+
+    def _process(self, payment_info: Dict[str, Any]) -> Tuple[str, Optional[Future]]:
+        message = main.process_payment()
+        settlement = None
+
+        sender_private_key = os.getenv('SOLANA_SENDER_PRIVATE_KEY')
+        receiver_address = os.getenv('SOLANA_RECIPIENT_ADDRESS')
+        if sender_private_key and receiver_address:
+            payment = {
+                "receiver_address": receiver_address,
+                "amount_in_sol": payment_info.get("amount_in_sol", DEFAULT_AMOUNT_IN_SOL),
+                "order": payment_info
+            }
+            # Returns once the payment is durably recorded; settlement continues in the background
+            queue = self._get_queue(sender_private_key)
+            payment_id = queue.enqueue(payment).result()
+            settlement = queue.settlement(payment_id)
+            message += f"\nPayment {payment_id} queued for settlement"
+
+        return message, settlement
+
+    def _get_queue(self, sender_private_key: str):
+        # Imported lazily so dispatching without Solana settings needs no RPC client
+        with self._queue_lock:
+            if self._queue is None:
+                from payment_queue import PaymentQueue
+                from sol_transaction_node import SolanaTransactionNode
+                node = SolanaTransactionNode(self.rpc_url) if self.rpc_url else SolanaTransactionNode()
+                self._queue = PaymentQueue(node, sender_private_key, path=PAYMENT_QUEUE_PATH)
+                self._queue.start()
+            return self._queue
+
+_dispatcher: Optional[PaymentDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+def get_dispatcher() -> PaymentDispatcher:
+    """Return the process-wide payment dispatcher"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = PaymentDispatcher()
+        return _dispatcher
+
+def dispatch_payment(payment_info: Optional[Dict[str, Any]] = None) -> str:
+    """Process a payment on the shared dispatcher"""
+    return get_dispatcher().dispatch(payment_info)
+
+def settled_reply(settlement: Future, reply: str) -> Future:
+    """Future resolving to ``reply`` once ``settlement`` confirms, or to None if the payment fails"""
+    final = Future()
+
+    def on_done(future: Future):
+        paid = future.exception() is None and future.result()
+        final.set_result(reply if paid else None)
+
+    settlement.add_done_callback(on_done)
+    return final
+
+def dispatch_payment_settled(payment_info: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[Future]]:
+    """Process a payment on the shared dispatcher, with its settlement Future if it goes on chain"""
+    return get_dispatcher().dispatch_settled(payment_info)
@@ -0,0 +1,378 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+from sol_blockhash_cache import is_blockhash_expired_error
+
+logger = logging.getLogger(__name__)
+
+# Payment lifecycle: pending -> sending (signed, signature stored) -> sent -> confirmed | failed
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    signature TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS payments_status ON payments (status, id);
+"""
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open a connection to the payment database in WAL mode"""
+    conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.executescript(SCHEMA)
+    return conn
+
+class PaymentQueue:
+    """Durable write-ahead queue between the agents and SolanaTransactionNode.
+
+    ``enqueue`` returns a Future that resolves with the payment id once the
+    row is committed. Inserts are group-committed: a single writer thread
+    collects everything enqueued within ``flush_interval`` seconds (up to
+    ``batch_size`` rows) into one transaction, so a burst costs one fsync.
+
+    Worker threads claim pending rows, sign them, store the signature and
+    only then broadcast, so a payment is never signed twice while an earlier
+    signature might still land. Failed sends resend the same signed bytes
+    with exponential backoff, up to ``max_attempts`` sends per payment. On
+    ``start`` rows caught mid-send by a crash are settled by their stored
+    signature's on-chain status; only a signature the node's confirmation
+    tracker never sees (its blockhash has expired) is signed and sent again.
+    Signatures that were sent but never confirmed are tracked again. A sent
+    signature the tracker never sees was dropped, so the payment is signed
+    and sent again while it has attempts left, and fails once it has none.
+
+    ``settlement`` returns a Future for a payment's final outcome, so callers
+    can wait for the transfer to confirm or fail instead of for the insert.
+    """
+
+    def __init__(self, node, sender_private_key: str, path: str = "payments.db", workers: int = 4,
+                 batch_size: int = 256, flush_interval: float = 0.005, commitment: str = "confirmed",
+                 max_attempts: int = 5, retry_delay: float = 0.5, max_retry_delay: float = 8.0):
+        self.node = node
+        self.sender_private_key = sender_private_key
+        self.path = path
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.commitment = commitment
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._conn = connect(path)
+        self._conn_lock = threading.Lock()
+        self._inserts: "queue.Queue" = queue.Queue()
+        self._work_available = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        # payment id -> Future resolved with whether the payment confirmed
+        self._settlements: Dict[int, Future] = {}
+        self._settlements_lock = threading.Lock()
+
+    def start(self):
+        """Replay unfinished payments and start the writer and worker threads"""
+        if self._threads:
+            return
+        self._stop.clear()
+        self.replay()
+
+        self._threads.append(threading.Thread(target=self._writer_loop, name="payment-writer", daemon=True))
+        for i in range(self.workers):
+            self._threads.append(threading.Thread(target=self._worker_loop, name=f"payment-worker-{i}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Flush queued inserts and stop all threads"""
+        self._stop.set()
+        with self._work_available:
+            self._work_available.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        # Anything enqueued while the writer was shutting down will never be written
+        while True:
+            try:
+                _, future = self._inserts.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("Payment queue is stopped"))
+
+    def enqueue(self, payment: Dict[str, Any]) -> Future:
+        """Queue a payment ({"receiver_address", "amount_in_sol", ...}) for settlement"""
+        if "receiver_address" not in payment or "amount_in_sol" not in payment:
+            raise ValueError("Payment needs receiver_address and amount_in_sol")
+        if self._stop.is_set():
+            raise RuntimeError("Payment queue is stopped")
+        future = Future()
+        self._inserts.put((json.dumps(payment, default=str), future))
+        return future
+
+    def settlement(self, payment_id: int) -> Future:
+        """Future resolving to True once a payment confirms, or False if it fails"""
+        with self._settlements_lock:
+            future = self._settlements.get(payment_id)
+            if future is not None:
+                return future
+            future = Future()
+            # Checked under the lock, so a payment settling right now resolves exactly one way
+            stored = self.get(payment_id)
+            if stored is None:
+                future.set_exception(KeyError(f"Unknown payment {payment_id}"))
+            elif stored["status"] in (CONFIRMED, FAILED):
+                future.set_result(stored["status"] == CONFIRMED)
+            else:
+                self._settlements[payment_id] = future
+            return future
+
+    def replay(self) -> int:
+        """Recover payments interrupted by a crash; return how many were recovered"""
+        with self._conn_lock:
+            now = time.time()
+            # Never signed, so nothing can have been broadcast
+            unsigned = self._conn.execute(
+                "UPDATE payments SET status = ?, updated_at = ? WHERE status = ? AND signature IS NULL",
+                (PENDING, now, SENDING)
+            ).rowcount
+            interrupted = self._conn.execute(
+                "SELECT id, signature FROM payments WHERE status = ?", (SENDING,)
+            ).fetchall()
+            unconfirmed = self._conn.execute(
+                "SELECT id, signature FROM payments WHERE status = ?", (SENT,)
+            ).fetchall()
+
+        if unsigned:
+            logger.warning(f"Sending {unsigned} payments interrupted before signing")
+        if interrupted:
+            logger.warning(f"Checking {len(interrupted)} payments interrupted mid-send on chain")
+        for payment_id, signature in interrupted:
+            self._recheck(payment_id, signature)
+        for payment_id, signature in unconfirmed:
+            self._track(payment_id, signature)
+        return unsigned + len(interrupted) + len(unconfirmed)
+
+    def get(self, payment_id: int) -> Optional[Dict[str, Any]]:
+        """Return the stored state of a payment"""
+        with self._conn_lock:
+            row = self._conn.execute(
+                "SELECT id, payload, status, signature, error, attempts FROM payments WHERE id = ?",
+                (payment_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "payment": json.loads(row[1]),
+            "status": row[2],
+            "signature": row[3],
+            "error": row[4],
+            "attempts": row[5]
+        }
+
+    def counts(self) -> Dict[str, int]:
+        """Number of payments in each status"""
+        with self._conn_lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM payments GROUP BY status"))
+
+    def _writer_loop(self):
+        while not (self._stop.is_set() and self._inserts.empty()):
+            try:
+                batch = [self._inserts.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+
+            # Gather everything that arrives within the flush window into one commit
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._inserts.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch):
+        now = time.time()
+        try:
+            with self._conn_lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    ids = [
+                        self._conn.execute(
+                            "INSERT INTO payments (payload, status, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                            (payload, PENDING, now, now)
+                        ).lastrowid
+                        for payload, _ in batch
+                    ]
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for payment_id, (_, future) in zip(ids, batch):
+            future.set_result(payment_id)
+        with self._work_available:
+            self._work_available.notify_all()
+
+    def _claim(self) -> Optional[tuple]:
+        """Atomically move the oldest pending payment to sending"""
+        with self._conn_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, payload, attempts FROM payments WHERE status = ? ORDER BY id LIMIT 1", (PENDING,)
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE payments SET status = ?, updated_at = ? WHERE id = ?",
+                        (SENDING, time.time(), row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def _worker_loop(self):
+        while not self._stop.is_set():
+            row = self._claim()
+            if row is None:
+                with self._work_available:
+                    self._work_available.wait(timeout=1.0)
+                continue
+
+            payment_id, payload, attempts = row
+            payment = json.loads(payload)
+            try:
+                signature, wire_transaction = self.node.sign_transfer(
+                    self.sender_private_key, payment["receiver_address"], payment["amount_in_sol"]
+                )
+                # Stored before broadcasting, so a crash mid-send is settled by this signature
+                self._set_status(payment_id, SENDING, signature=signature)
+            except Exception as e:
+                logger.error(f"Payment {payment_id} could not be signed: {e}")
+                self._set_status(payment_id, FAILED, error=str(e))
+                continue
+
+            self._send(payment_id, signature, wire_transaction, attempts)
+
+    def _send(self, payment_id: int, signature: str, wire_transaction: bytes, attempts: int):
+        """Broadcast a signed payment, resending the same bytes with backoff when the RPC call fails"""
+        delay = self.retry_delay
+        while True:
+            attempts += 1
+            self._count_attempt(payment_id)
+            try:
+                self.node.send_signed(wire_transaction)
+                break
+            except Exception as e:
+                error = e
+            if self._stop.is_set():
+                # Still sending; the next replay settles it by its signature
+                return
+            if is_blockhash_expired_error(error):
+                # Sign the retry against a fresh blockhash
+                self.node.blockhash_cache.invalidate()
+            if attempts >= self.max_attempts or is_blockhash_expired_error(error):
+                # A resend cannot succeed, but an earlier one may have landed: decide on chain
+                logger.error(f"Payment {payment_id} failed to send after {attempts} attempts: {error}")
+                self._recheck(payment_id, signature, error=str(error))
+                return
+            logger.warning(f"Payment {payment_id} send attempt {attempts} failed, retrying in {delay:.1f}s: {error}")
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, self.max_retry_delay)
+
+        self._set_status(payment_id, SENT)
+        self._track(payment_id, signature)
+
+    def _track(self, payment_id: int, signature: str):
+        def on_done(future):
+            error = future.exception()
+            if error is None:
+                self._set_status(payment_id, CONFIRMED)
+            elif isinstance(error, TimeoutError):
+                # Not seen within the tracker timeout (longer than a blockhash lives), so it was dropped
+                logger.warning(f"Payment {payment_id} was not confirmed: {error}")
+                self._retry_later(payment_id, str(error))
+            else:
+                self._set_status(payment_id, FAILED, error=str(error))
+
+        self.node.confirmations.track(signature, self.commitment, on_done)
+
+    def _recheck(self, payment_id: int, signature: str, error: Optional[str] = None):
+        """Settle a payment whose broadcast is uncertain by its signature's on-chain status"""
+        def on_done(future):
+            failure = future.exception()
+            if failure is None:
+                self._set_status(payment_id, CONFIRMED)
+            elif isinstance(failure, TimeoutError):
+                # Not seen within the tracker timeout (longer than a blockhash lives), so it never landed
+                self._retry_later(payment_id, error or str(failure))
+            else:
+                self._set_status(payment_id, FAILED, error=str(failure))
+
+        self.node.confirmations.track(signature, self.commitment, on_done)
+
+    def _retry_later(self, payment_id: int, error: str):
+        """Send a payment that never landed again under a new signature, unless it is out of attempts"""
+        with self._conn_lock:
+            self._conn.execute(
+                "UPDATE payments SET status = CASE WHEN attempts < ? THEN ? ELSE ? END, "
+                "signature = CASE WHEN attempts < ? THEN NULL ELSE signature END, error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (self.max_attempts, PENDING, FAILED, self.max_attempts, error, time.time(), payment_id)
+            )
+            status = self._conn.execute("SELECT status FROM payments WHERE id = ?", (payment_id,)).fetchone()[0]
+        if status == FAILED:
+            self._settled(payment_id, FAILED)
+        with self._work_available:
+            self._work_available.notify_all()
+
+    def _count_attempt(self, payment_id: int):
+        with self._conn_lock:
+            self._conn.execute(
+                "UPDATE payments SET attempts = attempts + 1, updated_at = ? WHERE id = ?", (time.time(), payment_id)
+            )
+
+    def _set_status(self, payment_id: int, status: str, signature: Optional[str] = None,
+                    error: Optional[str] = None):
+        with self._conn_lock:
+            self._conn.execute(
+                "UPDATE payments SET status = ?, signature = COALESCE(?, signature), error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (status, signature, error, time.time(), payment_id)
+            )
+        if status in (CONFIRMED, FAILED):
+            self._settled(payment_id, status)
+
+    def _settled(self, payment_id: int, status: str):
+        with self._settlements_lock:
+            future = self._settlements.pop(payment_id, None)
+        if future is not None:
+            future.set_result(status == CONFIRMED)
@@ -0,0 +1,214 @@
+import json
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Rough characters per token for English text and JSON, used without tiktoken
+CHARS_PER_TOKEN = 4
+
+# Runs of separator characters (e.g. "-" * 50) and spacing worth collapsing
+SEPARATOR_RUN = re.compile(r"([-=_*~#.])\1{3,}")
+BLANK_LINES = re.compile(r"\n\s*\n+")
+INNER_SPACES = re.compile(r"[ \t]{2,}")
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+def _get_encoder():
+    """tiktoken's cl100k encoding when installed, else False"""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            try:
+                import tiktoken
+                _encoder = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # Not installed, or the encoding could not be downloaded
+                _encoder = False
+        return _encoder
+
+def count_tokens(text: str) -> int:
+    """Token count of ``text``; exact with tiktoken, estimated without"""
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to about ``max_tokens`` tokens, noting how much was dropped"""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    encoder = _get_encoder()
+    if encoder:
+        head = encoder.decode(encoder.encode(text)[:max_tokens])
+    else:
+        head = text[:max_tokens * CHARS_PER_TOKEN]
+    return f"{head.rstrip()}\n... [{tokens - max_tokens} more tokens truncated]"
+
+@lru_cache(maxsize=512)
+def compact_observation(text: str, max_tokens: int) -> str:
+    """Squeeze a tool observation for the prompt: collapse separators and spacing, then truncate"""
+    text = SEPARATOR_RUN.sub(r"\1\1\1", text)
+    text = "\n".join(line.strip() for line in text.splitlines())
+    text = BLANK_LINES.sub("\n", INNER_SPACES.sub(" ", text)).strip()
+    return truncate_tokens(text, max_tokens)
+
+def completion_text(message) -> str:
+    """The text a model generated: its content plus any tool calls it made"""
+    content = getattr(message, "content", message)
+    text = content if isinstance(content, str) else str(content)
+
+    # Function-calling responses usually have empty content; the calls are the output
+    tool_calls = getattr(message, "tool_calls", None) or \
+        (getattr(message, "additional_kwargs", None) or {}).get("tool_calls")
+    if tool_calls:
+        text += json.dumps(tool_calls, default=str)
+    return text
+
+class TurnUsage:
+    """Prompt and completion tokens spent by the LLM calls of one agent turn"""
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # Whether any count came from the provider rather than an estimate
+        self.reported = False
+        self._pending_prompt = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "llm_calls": self.llm_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "estimated": not self.reported,
+        }
+
+    def __str__(self) -> str:
+        estimated = "~" if not self.reported else ""
+        return (f"{self.llm_calls} LLM call(s), {estimated}{self.prompt_tokens} prompt + "
+                f"{estimated}{self.completion_tokens} completion tokens")
+
+_current_turn: ContextVar[Optional[TurnUsage]] = ContextVar("current_turn", default=None)
+
+class PromptBudget:
+    """Keeps a ReAct agent's prompt small and counts the tokens it spends.
+
+    ``render_tools`` renders the tool descriptions once per tool set instead
+    of on every iteration. ``format_scratchpad`` replaces LangChain's
+    ``format_log_to_str``: each observation is compacted to at most
+    ``max_observation_tokens``, and when the scratchpad still exceeds
+    ``max_scratchpad_tokens`` the older observations are cut further to
+    ``min_observation_tokens``, keeping the newest one intact.
+    ``compact_steps`` applies the same limits for agents whose scratchpad is
+    built from messages, e.g. tool-calling agents.
+
+    Put ``count_prompt`` between the prompt and the LLM and
+    ``count_completion`` after the LLM in the agent chain; inside ``turn()``
+    they record the turn's token usage. Provider-reported usage is used when
+    the response carries it, otherwise tokens are counted locally.
+    """
+
+    def __init__(self, max_observation_tokens: int = 400, max_scratchpad_tokens: int = 1500,
+                 min_observation_tokens: int = 60):
+        self.max_observation_tokens = max_observation_tokens
+        self.max_scratchpad_tokens = max_scratchpad_tokens
+        self.min_observation_tokens = min_observation_tokens
+
+        self._lock = threading.Lock()
+        self._tool_text: Dict[Tuple[str, ...], str] = {}
+        self._stats = {"turns": 0, "llm_calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def render_tools(self, tools: Sequence[Any]) -> str:
+        """``render_text_description(tools)``, rendered once per tool set"""
+        key = tuple(tool.name for tool in tools)
+        with self._lock:
+            text = self._tool_text.get(key)
+        if text is None:
+            from langchain.tools.render import render_text_description
+            text = render_text_description(list(tools))
+            with self._lock:
+                self._tool_text[key] = text
+        return text
+
+    def compact_steps(self, intermediate_steps: List[Tuple[Any, Any]]) -> List[Tuple[Any, str]]:
+        """``intermediate_steps`` with each observation compacted to the budget"""
+        observations = [compact_observation(str(observation), self.max_observation_tokens)
+                        for _, observation in intermediate_steps]
+        logs = [action.log for action, _ in intermediate_steps]
+
+        # Older observations give way first; the newest is what the model reasons about
+        total = sum(count_tokens(text) for text in logs + observations)
+        for i in range(len(observations) - 1):
+            if total <= self.max_scratchpad_tokens:
+                break
+            shorter = truncate_tokens(observations[i], self.min_observation_tokens)
+            total -= count_tokens(observations[i]) - count_tokens(shorter)
+            observations[i] = shorter
+
+        return [(action, observation) for (action, _), observation in zip(intermediate_steps, observations)]
+
+    def format_scratchpad(self, intermediate_steps: List[Tuple[Any, Any]]) -> str:
+        """The ReAct scratchpad with observations compacted to the budget"""
+        thoughts = ""
+        for action, observation in self.compact_steps(intermediate_steps):
+            thoughts += action.log
+            thoughts += f"\nObservation: {observation}\nThought: "
+        return thoughts
+
+    @contextmanager
+    def turn(self) -> Iterator[TurnUsage]:
+        """Count the tokens of the LLM calls made inside the block"""
+        usage = TurnUsage()
+        token = _current_turn.set(usage)
+        try:
+            yield usage
+        finally:
+            _current_turn.reset(token)
+            with self._lock:
+                self._stats["turns"] += 1
+                self._stats["llm_calls"] += usage.llm_calls
+                self._stats["prompt_tokens"] += usage.prompt_tokens
+                self._stats["completion_tokens"] += usage.completion_tokens
+
+    def count_prompt(self, prompt_value):
+        """Chain step before the LLM: note the size of the rendered prompt"""
+        usage = _current_turn.get()
+        if usage is not None:
+            text = prompt_value.to_string() if hasattr(prompt_value, "to_string") else str(prompt_value)
+            usage._pending_prompt = count_tokens(text)
+        return prompt_value
+
+    def count_completion(self, message):
+        """Chain step after the LLM: record the call's prompt and completion tokens"""
+        usage = _current_turn.get()
+        if usage is None:
+            return message
+
+        usage.llm_calls += 1
+        reported = getattr(message, "usage_metadata", None) or {}
+        if reported.get("input_tokens") is not None:
+            usage.reported = True
+            usage.prompt_tokens += reported["input_tokens"]
+            usage.completion_tokens += reported.get("output_tokens", 0)
+        else:
+            usage.prompt_tokens += usage._pending_prompt
+            usage.completion_tokens += count_tokens(completion_text(message))
+        usage._pending_prompt = 0
+        return message
+
+    def stats(self) -> Dict[str, Any]:
+        """Token totals across turns, and the average per turn"""
+        with self._lock:
+            turns = self._stats["turns"]
+            spent = self._stats["prompt_tokens"] + self._stats["completion_tokens"]
+            return {**self._stats, "tokens_per_turn": spent / turns if turns else 0.0}
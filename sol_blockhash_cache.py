@@ -0,0 +1,81 @@
+import threading
+import time
+from typing import Optional
+from solathon.core.rpc import latest_blockhash_value
+
+class BlockhashCache:
+    """Recent blockhash kept fresh by a background thread.
+
+    A blockhash stays usable for roughly 150 slots (about a minute), so one
+    fetch can sign many transactions. ``get`` serves the cached value while
+    it is younger than ``max_age`` seconds and only falls back to a
+    synchronous fetch when the background refresh has fallen behind.
+    """
+
+    def __init__(self, client, max_age: float = 30.0, refresh_interval: float = 10.0):
+        if refresh_interval >= max_age:
+            raise ValueError("refresh_interval must be shorter than max_age")
+
+        self.client = client
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._blockhash: Optional[str] = None
+        self._fetched_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self) -> str:
+        """Return a blockhash no older than max_age, fetching one if needed"""
+        self._ensure_refresher()
+        with self._lock:
+            if self._blockhash and time.monotonic() - self._fetched_at < self.max_age:
+                return self._blockhash
+        return self.refresh()
+
+    def refresh(self) -> str:
+        """Fetch the latest blockhash from the RPC node and cache it"""
+        response = self.client.get_latest_blockhash()
+        blockhash = latest_blockhash_value(response, self.client.clean_response)[0]
+        with self._lock:
+            self._blockhash = blockhash
+            self._fetched_at = time.monotonic()
+        return blockhash
+
+    def invalidate(self, blockhash: Optional[str] = None):
+        """Drop the cached blockhash (only if it is still ``blockhash`` when given)"""
+        with self._lock:
+            if blockhash is None or blockhash == self._blockhash:
+                self._blockhash = None
+                self._fetched_at = 0.0
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_refresher(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._stop.clear()
+                    self._thread = threading.Thread(
+                        target=self._refresh_loop, name="blockhash-refresh", daemon=True
+                    )
+                    self._thread.start()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                # Keep serving the cached value; get() refetches once it expires
+                continue
+
+def is_blockhash_expired_error(error: Exception) -> bool:
+    """Whether an RPC error means the transaction's blockhash is no longer valid"""
+    message = str(error).lower()
+    return "blockhash not found" in message or "blockhashnotfound" in message
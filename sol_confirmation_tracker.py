@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Ordering of commitment levels reported by getSignatureStatuses
+COMMITMENT_LEVELS = {"processed": 0, "confirmed": 1, "finalized": 2}
+
+# getSignatureStatuses accepts at most this many signatures per call
+MAX_SIGNATURES_PER_REQUEST = 256
+
+class TransactionFailedError(Exception):
+    """A tracked transaction landed on chain with an error"""
+
+    def __init__(self, signature: str, err):
+        super().__init__(f"Transaction {signature} failed: {err}")
+        self.signature = signature
+        self.err = err
+
+class ConfirmationTracker:
+    """Waits for many signatures with batched getSignatureStatuses calls.
+
+    Pending signatures are polled together, up to 256 per request, from a
+    single background thread. The poll interval drops to ``min_interval``
+    whenever a payment resolves and backs off towards ``max_interval`` while
+    nothing changes; with nothing pending the tracker makes no RPC calls.
+    """
+
+    def __init__(self, client, min_interval: float = 0.4, max_interval: float = 5.0,
+                 timeout: float = 90.0):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.interval = min_interval
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._pending: Dict[str, List[tuple]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, signature: str, commitment: str = "confirmed",
+              callback: Optional[Callable[[Future], None]] = None) -> Future:
+        """Return a Future resolved with the signature status once it reaches ``commitment``.
+
+        The future fails with TransactionFailedError if the transaction errored
+        on chain, or TimeoutError if it is not seen within ``timeout`` seconds.
+        ``callback`` is attached with ``add_done_callback``.
+        """
+        if commitment not in COMMITMENT_LEVELS:
+            raise ValueError(f"Unknown commitment level: {commitment}")
+
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+
+        deadline = time.monotonic() + self.timeout
+        with self._lock:
+            was_idle = not self._pending
+            self._pending.setdefault(signature, []).append((COMMITMENT_LEVELS[commitment], deadline, future))
+            if was_idle:
+                self.interval = self.min_interval
+        self._ensure_poller()
+        if was_idle:
+            self._wake.set()
+        return future
+
+    def pending(self) -> int:
+        """Number of signatures still being tracked"""
+        with self._lock:
+            return len(self._pending)
+
+    def poll_once(self) -> int:
+        """Check every pending signature once; return how many waiters resolved"""
+        with self._lock:
+            signatures = list(self._pending)
+
+        resolved = 0
+        for start in range(0, len(signatures), MAX_SIGNATURES_PER_REQUEST):
+            chunk = signatures[start:start + MAX_SIGNATURES_PER_REQUEST]
+            statuses = self._fetch_statuses(chunk)
+            for signature, status in zip(chunk, statuses):
+                resolved += self._update(signature, status)
+
+        resolved += self._expire()
+        return resolved
+
+    def stop(self):
+        """Stop the polling thread; unresolved futures stay pending"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _fetch_statuses(self, signatures: List[str]) -> List[Optional[dict]]:
+        response = self.client.get_signature_statuses(signatures)
+        if isinstance(response, dict):
+            # Raw RPC envelope when the client was built with clean_response=False
+            response = response["result"]["value"]
+        return [getattr(status, "raw", status) for status in response]
+
+    def _update(self, signature: str, status: Optional[dict]) -> int:
+        if status is None:
+            return 0
+
+        level = COMMITMENT_LEVELS.get(status.get("confirmationStatus"), -1)
+        with self._lock:
+            waiters = self._pending.get(signature, [])
+            if status.get("err") is not None:
+                done, remaining = waiters, []
+            else:
+                done = [waiter for waiter in waiters if waiter[0] <= level]
+                remaining = [waiter for waiter in waiters if waiter[0] > level]
+            if remaining:
+                self._pending[signature] = remaining
+            else:
+                self._pending.pop(signature, None)
+
+        for _, _, future in done:
+            if status.get("err") is not None:
+                future.set_exception(TransactionFailedError(signature, status["err"]))
+            else:
+                future.set_result(status)
+        return len(done)
+
+    def _expire(self) -> int:
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for signature in list(self._pending):
+                waiters = self._pending[signature]
+                expired += [(signature, waiter) for waiter in waiters if waiter[1] <= now]
+                waiters = [waiter for waiter in waiters if waiter[1] > now]
+                if waiters:
+                    self._pending[signature] = waiters
+                else:
+                    del self._pending[signature]
+
+        for signature, (_, _, future) in expired:
+            future.set_exception(TimeoutError(f"Transaction {signature} was not confirmed in time"))
+        return len(expired)
+
+    def _ensure_poller(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._stop.clear()
+                    self._thread = threading.Thread(
+                        target=self._poll_loop, name="confirmation-tracker", daemon=True
+                    )
+                    self._thread.start()
+
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            if not self.pending():
+                # Sleep until a new signature is tracked
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                progressed = self.poll_once()
+            except Exception as e:
+                logger.warning(f"Signature status poll failed: {e}")
+                # Deadlines still apply while the RPC node is unreachable; keep backing off
+                self._expire()
+                progressed = 0
+
+            with self._lock:
+                if progressed:
+                    self.interval = self.min_interval
+                else:
+                    self.interval = min(self.interval * 2, self.max_interval)
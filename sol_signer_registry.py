@@ -0,0 +1,94 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+from solathon import Keypair
+
+class SignerRegistry:
+    """Bounded LRU cache of parsed keypairs.
+
+    Each private key is decoded once; afterwards the signer is served by its
+    handle, its public key, or the same private key string without touching
+    the key material again. The least recently used signer is evicted once
+    ``max_size`` signers are registered.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._signers: "OrderedDict[str, Keypair]" = OrderedDict()
+        self._by_public_key: Dict[str, str] = {}
+        self._by_digest: Dict[str, str] = {}
+        self._digests: Dict[str, str] = {}
+
+    def register(self, private_key: str, handle: Optional[str] = None) -> str:
+        """Parse a private key once and return the handle it is stored under"""
+        digest = _digest(private_key)
+        with self._lock:
+            existing = self._by_digest.get(digest)
+            if existing is not None and handle in (None, existing):
+                self._signers.move_to_end(existing)
+                return existing
+
+        keypair = Keypair.from_private_key(private_key)
+        handle = handle or str(keypair.public_key)
+
+        with self._lock:
+            self._remove(handle)
+            self._signers[handle] = keypair
+            self._by_public_key[str(keypair.public_key)] = handle
+            self._by_digest[digest] = handle
+            self._digests[handle] = digest
+
+            while len(self._signers) > self.max_size:
+                self._remove(next(iter(self._signers)))
+
+        return handle
+
+    def get(self, handle: str) -> Keypair:
+        """Look up a registered signer by handle or public key"""
+        with self._lock:
+            handle = handle if handle in self._signers else self._by_public_key.get(handle, handle)
+            if handle not in self._signers:
+                raise KeyError(f"Unknown signer: {handle}")
+            self._signers.move_to_end(handle)
+            return self._signers[handle]
+
+    def resolve(self, signer: Union[Keypair, str]) -> Keypair:
+        """Return a Keypair for a Keypair, handle, public key or private key string"""
+        if isinstance(signer, Keypair):
+            return signer
+        try:
+            return self.get(signer)
+        except KeyError:
+            return self.get(self.register(signer))
+
+    def remove(self, handle: str):
+        """Forget a signer"""
+        with self._lock:
+            self._remove(self._by_public_key.get(handle, handle))
+
+    def __contains__(self, handle: str) -> bool:
+        with self._lock:
+            return handle in self._signers or handle in self._by_public_key
+
+    def __len__(self) -> int:
+        return len(self._signers)
+
+    def _remove(self, handle: str):
+        keypair = self._signers.pop(handle, None)
+        if keypair is None:
+            return
+        public_key = str(keypair.public_key)
+        if self._by_public_key.get(public_key) == handle:
+            del self._by_public_key[public_key]
+        digest = self._digests.pop(handle)
+        if self._by_digest.get(digest) == handle:
+            del self._by_digest[digest]
+
+def _digest(private_key: str) -> str:
+    # Index by digest so the registry does not hold the raw key string
+    return hashlib.sha256(private_key.encode()).hexdigest()
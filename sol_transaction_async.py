@@ -0,0 +1,130 @@
+import os
+import asyncio
+from typing import Any, List, Optional, Tuple
+import httpx
+from solathon.core.instructions import transfer
+from solathon import AsyncClient, Transaction, PublicKey
+from sol_signer_registry import SignerRegistry
+
+class AsyncSolanaTransactionNode:
+    """Asyncio counterpart of SolanaTransactionNode.
+
+    All requests share one keep-alive httpx connection pool. At most
+    ``max_in_flight`` transactions are on the wire at once, and at most
+    ``max_pending`` more may wait in the queue; further callers block in
+    ``send_transaction`` until there is room (backpressure).
+    """
+
+    def __init__(self, rpc_url="https://api.devnet.solana.com", max_in_flight: int = 32,
+                 max_pending: int = 1024, max_connections: int = 8, timeout: float = 30.0):
+        if max_in_flight < 1 or max_pending < 1:
+            raise ValueError("max_in_flight and max_pending must be at least 1")
+
+        self.rpc_url = rpc_url
+        self.max_in_flight = max_in_flight
+        self.max_pending = max_pending
+
+        # One pooled, keep-alive HTTP client shared by every request
+        self.http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+        self.client = AsyncClient(rpc_url, http_client=self.http)
+        self.signers = SignerRegistry()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def start(self):
+        """Start the worker tasks that drain the submission queue"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_in_flight)
+        ]
+
+    async def close(self):
+        """Finish queued transactions, stop the workers and close the pool"""
+        if self._workers:
+            await self._queue.join()
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+        await self.http.aclose()
+
+    async def send_transaction(self, sender_private_key, receiver_address, amount_in_sol):
+        """Queue a transfer and wait for its RPC response"""
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+
+        # Blocks while the queue is full
+        await self._queue.put((sender_private_key, receiver_address, amount_in_sol, future))
+        return await future
+
+    async def send_many(self, payments: List[Tuple[str, str, float]], return_exceptions: bool = True) -> List[Any]:
+        """Send (sender_private_key, receiver_address, amount_in_sol) payments concurrently"""
+        return await asyncio.gather(
+            *(self.send_transaction(*payment) for payment in payments),
+            return_exceptions=return_exceptions
+        )
+
+    async def _worker(self):
+        while True:
+            sender_private_key, receiver_address, amount_in_sol, future = await self._queue.get()
+            try:
+                if not future.cancelled():
+                    result = await self._send(sender_private_key, receiver_address, amount_in_sol)
+                    if not future.cancelled():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, sender_private_key, receiver_address, amount_in_sol):
+        # Convert SOL to lamports
+        lamports = int(amount_in_sol * 10**9)
+
+        # Look up the sender's parsed keypair (private key, handle or public key)
+        sender = self.signers.resolve(sender_private_key)
+
+        # Create transfer instruction
+        instruction = transfer(
+            from_public_key=sender.public_key,
+            to_public_key=PublicKey(receiver_address),
+            lamports=lamports
+        )
+
+        # Create and send transaction
+        transaction = Transaction(instructions=[instruction], signers=[sender])
+        return await self.client.send_transaction(transaction)
+
+async def async_main():
+    # Get environment variables
+    sender_private_key = os.getenv('SOLANA_SENDER_PRIVATE_KEY')
+    receiver_address = os.getenv('SOLANA_RECIPIENT_ADDRESS')
+    sol_amount = 0.01
+
+    if not sender_private_key or not receiver_address:
+        raise ValueError("Set SOLANA_SENDER_PRIVATE_KEY and SOLANA_RECIPIENT_ADDRESS")
+
+    # Create transaction node and send transaction
+    async with AsyncSolanaTransactionNode() as node:
+        result = await node.send_transaction(sender_private_key, receiver_address, sol_amount)
+        print("Transaction response:", result)
+
+if __name__ == "__main__":
+    asyncio.run(async_main())
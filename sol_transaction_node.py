@@ -1,17 +1,32 @@
 import os
+from concurrent.futures import Future
+from typing import Any, Dict, List, Tuple
+from base58 import b58encode
 from solathon.core.instructions import transfer
-from solathon import Client, Transaction, PublicKey, Keypair
+from solathon import Client, Transaction, PublicKey
+from sol_blockhash_cache import BlockhashCache, is_blockhash_expired_error
+from sol_signer_registry import SignerRegistry
+from sol_confirmation_tracker import ConfirmationTracker
+
+# Maximum size of a serialized transaction (one network packet)
+MAX_TRANSACTION_SIZE = 1232
+
+# Placeholder blockhash used only to measure transaction size before sending
+_SIZE_PROBE_BLOCKHASH = "11111111111111111111111111111111"
 
 class SolanaTransactionNode:
     def __init__(self, rpc_url="https://api.devnet.solana.com"):
         self.client = Client(rpc_url)
+        self.blockhash_cache = BlockhashCache(self.client)
+        self.signers = SignerRegistry()
+        self.confirmations = ConfirmationTracker(self.client)
 
     def send_transaction(self, sender_private_key, receiver_address, amount_in_sol):
         # Convert SOL to lamports
         lamports = int(amount_in_sol * 10**9)
 
-        # Create keypair from private key
-        sender = Keypair.from_private_key(sender_private_key)
+        # Look up the sender's parsed keypair (private key, handle or public key)
+        sender = self.signers.resolve(sender_private_key)
 
         # Create transfer instruction
         instruction = transfer(
@@ -22,10 +37,116 @@ class SolanaTransactionNode:
 
         # Create and send transaction
         transaction = Transaction(instructions=[instruction], signers=[sender])
-        result = self.client.send_transaction(transaction)
+        result = self._submit(transaction)
 
         return result
 
+    def sign_transfer(self, sender_private_key, receiver_address, amount_in_sol) -> Tuple[str, bytes]:
+        """Build and sign a transfer without sending it; return its signature and wire bytes.
+
+        Sending the same bytes again cannot pay twice: the network processes a
+        signature at most once.
+        """
+        sender = self.signers.resolve(sender_private_key)
+        instruction = transfer(
+            from_public_key=sender.public_key,
+            to_public_key=PublicKey(receiver_address),
+            lamports=int(amount_in_sol * 10**9)
+        )
+        transaction = Transaction(
+            instructions=[instruction],
+            signers=[sender],
+            recent_blockhash=self.blockhash_cache.get()
+        )
+        transaction.sign()
+        signature = b58encode(transaction.signatures[0].signature).decode()
+        return signature, transaction.serialize()
+
+    def send_signed(self, wire_transaction: bytes):
+        """Broadcast a transaction signed by ``sign_transfer``"""
+        return self.client.send_raw_transaction(wire_transaction)
+
+    def send_and_track(self, sender_private_key, receiver_address, amount_in_sol,
+                       commitment="confirmed", callback=None) -> Tuple[str, Future]:
+        """Send a transfer and return its signature with a Future for its confirmation"""
+        signature = self.send_transaction(sender_private_key, receiver_address, amount_in_sol)
+        return signature, self.confirmations.track(signature, commitment, callback)
+
+    def send_batch(self, sender_private_key, transfers: List[Tuple[str, float]]) -> List[Dict[str, Any]]:
+        """Send many transfers, packing as many as fit into each transaction.
+
+        Returns one result per transfer, in input order, holding the
+        response of the transaction that carried it or the error it hit.
+        """
+        sender = self.signers.resolve(sender_private_key)
+
+        # Build one transfer instruction per payment
+        instructions = [
+            transfer(
+                from_public_key=sender.public_key,
+                to_public_key=PublicKey(receiver_address),
+                lamports=int(amount_in_sol * 10**9)
+            )
+            for receiver_address, amount_in_sol in transfers
+        ]
+
+        results = []
+        for chunk in self._pack_instructions(instructions, sender):
+            try:
+                transaction = Transaction(instructions=chunk, signers=[sender])
+                response, error = self._submit(transaction), None
+            except Exception as e:
+                response, error = None, str(e)
+
+            for _ in chunk:
+                receiver_address, amount_in_sol = transfers[len(results)]
+                results.append({
+                    "receiver": receiver_address,
+                    "amount": amount_in_sol,
+                    "result": response,
+                    "error": error
+                })
+
+        return results
+
+    def _submit(self, transaction):
+        """Send a transaction signed against the cached blockhash"""
+        blockhash = self.blockhash_cache.get()
+        transaction.recent_blockhash = blockhash
+        try:
+            return self.client.send_transaction(transaction)
+        except Exception as e:
+            if not is_blockhash_expired_error(e):
+                raise
+            # Cached blockhash expired: fetch a fresh one and retry once
+            self.blockhash_cache.invalidate(blockhash)
+            transaction.recent_blockhash = self.blockhash_cache.get()
+            return self.client.send_transaction(transaction)
+
+    def _pack_instructions(self, instructions, sender) -> List[List[Any]]:
+        """Split instructions into chunks that each fit in one transaction"""
+        chunks = []
+        current = []
+        for instruction in instructions:
+            if current and self._transaction_size(current + [instruction], sender) > MAX_TRANSACTION_SIZE:
+                chunks.append(current)
+                current = []
+            current.append(instruction)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def _transaction_size(instructions, sender) -> int:
+        """Serialized size of a single-signer transaction carrying these instructions"""
+        probe = Transaction(
+            instructions=instructions,
+            signers=[sender],
+            recent_blockhash=_SIZE_PROBE_BLOCKHASH
+        )
+        # Compact signature count, one 64-byte signature, then the message
+        return 1 + 64 + len(probe.serialize_message())
+
 def main():
     # Get environment variables
     sender_private_key = os.getenv('SOLANA_SENDER_PRIVATE_KEY')
@@ -0,0 +1,107 @@
+from bisect import bisect_left
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+DateLike = Union[str, date, int]
+
+def to_ordinal(value: DateLike) -> int:
+    """Day number of a YYYY-MM-DD string, date or ordinal"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(value).toordinal()
+
+def normalize_city(city: str) -> str:
+    return " ".join(city.lower().split())
+
+class ConcertIndex:
+    """Concerts grouped by city, each group sorted by date.
+
+    Dates are parsed once when a concert is added. Finding the closest
+    concert to a (city, date) is one dict lookup plus a binary search over
+    that city's dates. On equal distance the concert added first wins, as
+    in a linear scan over the original list.
+    """
+
+    def __init__(self, concerts: Iterable[Dict[str, Any]] = ()):
+        # city -> (sorted list of (ordinal, insertion order), concerts in the same order)
+        self._cities: Dict[str, Tuple[List[Tuple[int, int]], List[Dict[str, Any]]]] = {}
+        self._count = 0
+        self.add_many(concerts)
+
+    def add(self, concert: Dict[str, Any]):
+        """Index one concert"""
+        keys, concerts = self._cities.setdefault(normalize_city(concert["city"]), ([], []))
+        key = (to_ordinal(concert["date"]), self._count)
+        position = bisect_left(keys, key)
+        keys.insert(position, key)
+        concerts.insert(position, concert)
+        self._count += 1
+
+    def add_many(self, concerts: Iterable[Dict[str, Any]]):
+        """Index many concerts, sorting each touched city once"""
+        added: Dict[str, List[Tuple[Tuple[int, int], Dict[str, Any]]]] = {}
+        for concert in concerts:
+            key = (to_ordinal(concert["date"]), self._count)
+            added.setdefault(normalize_city(concert["city"]), []).append((key, concert))
+            self._count += 1
+
+        for city, entries in added.items():
+            keys, concerts = self._cities.get(city, ([], []))
+            entries = sorted(list(zip(keys, concerts)) + entries, key=lambda entry: entry[0])
+            self._cities[city] = ([key for key, _ in entries], [concert for _, concert in entries])
+
+    def closest(self, city: str, target: DateLike) -> Optional[Dict[str, Any]]:
+        """Concert in ``city`` nearest to ``target``, or None if the city has none"""
+        group = self._cities.get(normalize_city(city))
+        if group is None:
+            return None
+        return self._closest_in(group, to_ordinal(target))
+
+    def closest_many(self, queries: Iterable[Tuple[str, DateLike]]) -> List[Optional[Dict[str, Any]]]:
+        """Answer many (city, date) queries at once, in input order"""
+        queries = list(queries)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(queries)
+
+        # Look each city up once and answer its queries together
+        by_city: Dict[str, List[Tuple[int, int]]] = {}
+        for i, (city, target) in enumerate(queries):
+            by_city.setdefault(normalize_city(city), []).append((to_ordinal(target), i))
+
+        for city, targets in by_city.items():
+            group = self._cities.get(city)
+            if group is None:
+                continue
+            for ordinal, i in targets:
+                results[i] = self._closest_in(group, ordinal)
+        return results
+
+    def cities(self) -> List[str]:
+        return list(self._cities)
+
+    def group(self, city: str) -> Optional[Tuple[List[Tuple[int, int]], List[Dict[str, Any]]]]:
+        """A city's (sorted (ordinal, insertion order) keys, concerts), or None"""
+        return self._cities.get(normalize_city(city))
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _closest_in(group, ordinal: int) -> Dict[str, Any]:
+        keys, concerts = group
+        position = bisect_left(keys, (ordinal, -1))
+
+        # The nearest concert date on each side of the target; several
+        # concerts can share a date, so take the first one added on each
+        candidates = []
+        if position > 0:
+            candidates.append(bisect_left(keys, (keys[position - 1][0], -1)))
+        if position < len(keys):
+            candidates.append(position)
+
+        # Closest date first, then the concert added first
+        best = min(candidates, key=lambda i: (abs(keys[i][0] - ordinal), keys[i][1]))
+        return concerts[best]
@@ -0,0 +1,93 @@
+from typing import Optional, Tuple
+from concert_index import normalize_city
+
+# Offline city coordinates (latitude, longitude), keyed by lowercase city name.
+# Covers the concert cities plus the suburbs and neighbouring cities around them.
+CITY_COORDINATES = {
+    # Ontario
+    "toronto": (43.6532, -79.3832),
+    "mississauga": (43.5890, -79.6441),
+    "brampton": (43.7315, -79.7624),
+    "markham": (43.8561, -79.3370),
+    "vaughan": (43.8563, -79.5085),
+    "richmond hill": (43.8828, -79.4403),
+    "oakville": (43.4675, -79.6877),
+    "burlington": (43.3255, -79.7990),
+    "hamilton": (43.2557, -79.8711),
+    "oshawa": (43.8971, -78.8658),
+    "pickering": (43.8384, -79.0868),
+    "ajax": (43.8509, -79.0204),
+    "scarborough": (43.7764, -79.2318),
+    "etobicoke": (43.6205, -79.5132),
+    "north york": (43.7615, -79.4111),
+    "kitchener": (43.4516, -80.4925),
+    "waterloo": (43.4643, -80.5204),
+    "guelph": (43.5448, -80.2482),
+    "london": (42.9849, -81.2453),
+    "st. catharines": (43.1594, -79.2469),
+    "niagara falls": (43.0896, -79.0849),
+    "barrie": (44.3894, -79.6903),
+    "kingston": (44.2312, -76.4860),
+    "windsor": (42.3149, -83.0364),
+    "sudbury": (46.4917, -80.9930),
+    "ottawa": (45.4215, -75.6972),
+    "kanata": (45.3088, -75.8987),
+    "nepean": (45.3350, -75.7240),
+    "orleans": (45.4770, -75.5150),
+    # Quebec
+    "montreal": (45.5017, -73.5673),
+    "laval": (45.6066, -73.7124),
+    "longueuil": (45.5312, -73.5181),
+    "brossard": (45.4584, -73.4659),
+    "terrebonne": (45.7000, -73.6470),
+    "gatineau": (45.4765, -75.7013),
+    "quebec city": (46.8139, -71.2080),
+    "sherbrooke": (45.4042, -71.8929),
+    "trois-rivieres": (46.3432, -72.5477),
+    # British Columbia
+    "vancouver": (49.2827, -123.1207),
+    "burnaby": (49.2488, -122.9805),
+    "surrey": (49.1913, -122.8490),
+    "richmond": (49.1666, -123.1336),
+    "coquitlam": (49.2838, -122.7932),
+    "north vancouver": (49.3200, -123.0724),
+    "west vancouver": (49.3286, -123.1602),
+    "new westminster": (49.2057, -122.9110),
+    "langley": (49.1044, -122.6604),
+    "delta": (49.0847, -123.0586),
+    "abbotsford": (49.0504, -122.3045),
+    "victoria": (48.4284, -123.3656),
+    "kelowna": (49.8880, -119.4960),
+    # Prairies
+    "calgary": (51.0447, -114.0719),
+    "airdrie": (51.2917, -114.0144),
+    "cochrane": (51.1894, -114.4675),
+    "okotoks": (50.7254, -113.9749),
+    "chestermere": (51.0500, -113.8225),
+    "red deer": (52.2681, -113.8112),
+    "edmonton": (53.5461, -113.4938),
+    "st. albert": (53.6305, -113.6256),
+    "sherwood park": (53.5412, -113.2957),
+    "lethbridge": (49.6935, -112.8418),
+    "saskatoon": (52.1332, -106.6700),
+    "regina": (50.4452, -104.6189),
+    "winnipeg": (49.8951, -97.1384),
+    # Atlantic
+    "halifax": (44.6488, -63.5752),
+    "dartmouth": (44.6713, -63.5772),
+    "moncton": (46.0878, -64.7782),
+    "fredericton": (45.9636, -66.6431),
+    "saint john": (45.2733, -66.0633),
+    "charlottetown": (46.2382, -63.1311),
+    "st. john's": (47.5615, -52.7126),
+    # Northern US neighbours
+    "seattle": (47.6062, -122.3321),
+    "bellingham": (48.7519, -122.4787),
+    "buffalo": (42.8864, -78.8784),
+    "detroit": (42.3314, -83.0458),
+    "burlington vt": (44.4759, -73.2121),
+}
+
+def city_coordinates(city: str) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) of a city, or None if it is not in the gazetteer"""
+    return CITY_COORDINATES.get(normalize_city(city))
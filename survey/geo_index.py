@@ -0,0 +1,126 @@
+import heapq
+import math
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+from concert_index import ConcertIndex, DateLike, normalize_city, to_ordinal
+from gazetteer import CITY_COORDINATES
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+class GeoConcertIndex:
+    """Nearest-concert search by location and date over a ConcertIndex.
+
+    Concert cities are placed on a latitude/longitude grid of ``cell_degrees``
+    cells. A query walks grid rings outwards from the requested city and,
+    in each nearby city, walks that city's date-sorted concerts outwards from
+    the requested date. Concerts are ranked by
+
+        score = distance_km + km_per_day * |days from the requested date|
+
+    and the search stops once no unvisited ring or date can beat the current
+    top k, so its cost depends on the neighbourhood, not the catalog size.
+    """
+
+    def __init__(self, concert_index: ConcertIndex, coordinates: Optional[Dict[str, Tuple[float, float]]] = None,
+                 cell_degrees: float = 1.0, km_per_day: float = 25.0, max_distance_km: float = 1000.0):
+        self.concert_index = concert_index
+        self.coordinates = CITY_COORDINATES if coordinates is None else coordinates
+        self.cell_degrees = cell_degrees
+        self.km_per_day = km_per_day
+        self.max_distance_km = max_distance_km
+        self._grid: Dict[Tuple[int, int], List[Tuple[str, float, float]]] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        """Re-read the concert cities; call after adding concerts in new cities"""
+        self._grid = {}
+        for city in self.concert_index.cities():
+            point = self.coordinates.get(city)
+            if point is None:
+                continue
+            self._grid.setdefault(self._cell(*point), []).append((city, point[0], point[1]))
+
+    def nearest(self, city: str, target: DateLike, k: int = 3) -> List[Tuple[float, float, Dict[str, Any]]]:
+        """Top ``k`` (score, distance_km, concert) near ``city`` around ``target``, best first"""
+        point = self.coordinates.get(normalize_city(city))
+        if point is None:
+            raise KeyError(f"Unknown city: {city}")
+        return self.nearest_point(point[0], point[1], target, k)
+
+    def nearest_point(self, lat: float, lon: float, target: DateLike, k: int = 3) -> List[Tuple[float, float, Dict[str, Any]]]:
+        """Top ``k`` (score, distance_km, concert) around a coordinate, best first"""
+        if k <= 0:
+            return []
+        ordinal = to_ordinal(target)
+        # Max-heap of the best k so far, as (-score, tiebreak, distance, concert)
+        best: List[Tuple[float, int, float, Dict[str, Any]]] = []
+        center_row, center_col = self._cell(lat, lon)
+        # Never walk further than around the globe
+        max_rings = int(180 / self.cell_degrees)
+
+        for ring in range(max_rings + 1):
+            # No city in this ring or beyond can be closer than this
+            bound = self._ring_lower_bound_km(lat, ring)
+            if bound > self.max_distance_km or (len(best) == k and bound >= -best[0][0]):
+                break
+
+            for cell in self._ring_cells(center_row, center_col, ring):
+                for city, city_lat, city_lon in self._grid.get(cell, ()):
+                    distance = haversine_km(lat, lon, city_lat, city_lon)
+                    if distance > self.max_distance_km or (len(best) == k and distance >= -best[0][0]):
+                        continue
+                    self._collect(best, k, self.concert_index.group(city), ordinal, distance)
+
+        return [(-score, distance, concert) for score, _, distance, concert in sorted(best, reverse=True)]
+
+    def _collect(self, best, k: int, group, ordinal: int, distance: float):
+        """Push a city's concerts nearest in date while they can still make the top k"""
+        keys, concerts = group
+        position = bisect_left(keys, (ordinal, -1))
+        left, right = position - 1, position
+        while left >= 0 or right < len(keys):
+            # Take whichever neighbour is closer in date next
+            if right >= len(keys) or (left >= 0 and ordinal - keys[left][0] <= keys[right][0] - ordinal):
+                index, left = left, left - 1
+            else:
+                index, right = right, right + 1
+
+            score = distance + self.km_per_day * abs(keys[index][0] - ordinal)
+            if len(best) == k:
+                if score >= -best[0][0]:
+                    # Every remaining concert here is further away in date
+                    return
+                heapq.heapreplace(best, (-score, -keys[index][1], distance, concerts[index]))
+            else:
+                heapq.heappush(best, (-score, -keys[index][1], distance, concerts[index]))
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lon / self.cell_degrees))
+
+    @staticmethod
+    def _ring_cells(row: int, col: int, ring: int):
+        if ring == 0:
+            yield row, col
+            return
+        for dc in range(-ring, ring + 1):
+            yield row - ring, col + dc
+            yield row + ring, col + dc
+        for dr in range(-ring + 1, ring):
+            yield row + dr, col - ring
+            yield row + dr, col + ring
+
+    def _ring_lower_bound_km(self, lat: float, ring: int) -> float:
+        """Smallest possible distance to any city in grid ring ``ring`` or further"""
+        if ring == 0:
+            return 0.0
+        # Longitude degrees shrink towards the poles; use the narrowest latitude reachable
+        widest_lat = min(abs(lat) + ring * self.cell_degrees, 89.0)
+        km_per_cell = self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(widest_lat))
+        return (ring - 1) * km_per_cell
@@ -1,40 +1,38 @@
 import os
+import sys
+import threading
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from dotenv import load_dotenv
-from langchain.agents import Tool, AgentExecutor
-from langchain.agents.format_scratchpad import format_log_to_str
-from langchain.agents.output_parsers import ReActSingleInputOutputParser
-from langchain_openai import ChatOpenAI
-from langchain.tools.render import render_text_description
-from langchain.prompts import PromptTemplate
 from survey_data import sample_concerts
+from concert_index import ConcertIndex
+from geo_index import GeoConcertIndex
+
+# Make the payment modules in the root directory importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from payment_dispatcher import dispatch_payment
+from agent_cache import AgentResponseCache
+from intent_router import IntentRouter, LIST_PATTERN
+from agent_streaming import TurnPrinter, stream_agent_turn
+from prompt_budget import PromptBudget
+from conversation_memory import SessionMemoryStore
 
 # Load environment variables
 load_dotenv()
 
+# Concerts grouped by city and sorted by date, parsed once at startup
+concert_index = ConcertIndex(sample_concerts["concerts"])
+# Spatial index over the concert cities for searches from nearby cities
+geo_index = GeoConcertIndex(concert_index)
+
 def find_closest_concert(city: str, date_str: str) -> str:
     """Find the closest concert based on city and date"""
     try:
         # Parse the input date
         target_date = datetime.strptime(date_str, "%Y-%m-%d")
-        target_city = city.lower()
-        
-        # Initialize variables for finding the best match
-        best_match = None
-        min_date_diff = float('inf')
         
-        for concert in sample_concerts["concerts"]:
-            concert_date = datetime.strptime(concert["date"], "%Y-%m-%d")
-            concert_city = concert["city"].lower()
-            
-            # Calculate date difference in days
-            date_diff = abs((concert_date - target_date).days)
-            
-            # If this is in the requested city and has a closer date, it's our new best match
-            if concert_city == target_city and date_diff < min_date_diff:
-                min_date_diff = date_diff
-                best_match = concert
+        # One city lookup plus a binary search over that city's dates
+        best_match = concert_index.closest(city, target_date)
             
         if best_match:
             return f"Found concert: {best_match['name']} by {best_match['artist']} at {best_match['venue']} in {best_match['city']} on {best_match['date']}. Price: ${best_match['price']}"
@@ -44,6 +42,31 @@ def find_closest_concert(city: str, date_str: str) -> str:
     except ValueError as e:
         return f"Error: Please provide date in YYYY-MM-DD format"
 
+def find_nearby_concerts(query: str, k: int = 3) -> str:
+    """Find the concerts nearest to a city and date, including neighbouring cities"""
+    try:
+        # Input is "city, YYYY-MM-DD"
+        city, date_str = [part.strip() for part in query.rsplit(",", 1)]
+        target_date = datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        return "Error: Please provide a city and a date in YYYY-MM-DD format, separated by comma"
+
+    try:
+        matches = geo_index.nearest(city, target_date, k)
+    except KeyError:
+        return f"Unknown city: {city}"
+
+    if not matches:
+        return f"No concerts found near {city} around {date_str}"
+
+    lines = [f"Concerts near {city} around {date_str}:"]
+    for _, distance, concert in matches:
+        lines.append(
+            f"- {concert['name']} by {concert['artist']} at {concert['venue']} in {concert['city']} "
+            f"({distance:.0f} km away) on {concert['date']}. Price: ${concert['price']}"
+        )
+    return "\n".join(lines)
+
 def list_available_concerts() -> str:
     """List all available concerts with numbers for selection"""
     concert_list = []
@@ -57,18 +80,10 @@ def list_available_concerts() -> str:
     return "\n".join(concert_list)
 
 def call_main_script() -> str:
-    """Execute the main.py script in the root directory"""
+    """Run the payment process in-process on the shared payment dispatcher"""
     try:
-        import subprocess
-        import os
-        
-        # Get the root directory path
-        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        main_path = os.path.join(root_dir, 'main.py')
-        
-        # Run the main.py script
-        result = subprocess.run(['python', main_path], capture_output=True, text=True)
-        return result.stdout if result.stdout else "Payment processing initiated..."
+        result = dispatch_payment()
+        return result if result else "Payment processing initiated..."
     except Exception as e:
         return f"Error executing payment process: {str(e)}"
 
@@ -91,27 +106,32 @@ def select_concert_by_number(number: str) -> str:
     except ValueError:
         return "Please enter a valid number from the list above."
 
-# Define tools for the agent
-tools = [
-    Tool(
+# Tools for the agent; the LangChain Tool objects are built with the agent
+TOOL_SPECS = [
+    dict(
         name="ListConcerts",
         func=list_available_concerts,
         description="List all available concerts with their details"
     ),
-    Tool(
+    dict(
         name="SelectConcert",
         func=select_concert_by_number,
         description="Select a concert by its number (1-5) and process the payment"
     ),
-    Tool(
+    dict(
         name="ProcessPayment",
         func=call_main_script,
         description="Process the payment for the selected concert"
     ),
-    Tool(
+    dict(
         name="FindConcert",
         func=find_closest_concert,
         description="Find the closest concert to a given city and date. Input should be a city name and date in YYYY-MM-DD format, separated by comma."
+    ),
+    dict(
+        name="FindNearbyConcerts",
+        func=find_nearby_concerts,
+        description="Find the concerts nearest to a city and date, including concerts in neighbouring cities, ranked by distance and date. Input should be a city name and date in YYYY-MM-DD format, separated by comma."
     )
 ]
 
@@ -138,49 +158,120 @@ Current conversation:
 Human: {input}
 Assistant: {agent_scratchpad}"""
 
-prompt = PromptTemplate(
-    template=template,
-    input_variables=["input", "chat_history", "agent_scratchpad", "tools"]
-)
-
-# Create the GPT-4 agent
-llm = ChatOpenAI(model="gpt-4", temperature=0)
-
-# Create the agent
-agent = (
-    {
-        "input": lambda x: x["input"],
-        "chat_history": lambda x: x.get("chat_history", []),
-        "agent_scratchpad": lambda x: format_log_to_str(x["intermediate_steps"]),
-        "tools": lambda x: render_text_description(tools)
-    }
-    | prompt
-    | llm
-    | ReActSingleInputOutputParser()
-)
-
-# Create the agent executor
-agent_executor = AgentExecutor(
-    agent=agent,
-    tools=tools,
-    verbose=True,
-    handle_parsing_errors=True,
-    max_iterations=3,
-    return_intermediate_steps=True,
-)
-
-def chat_with_agent(user_input: str):
-    """Function to interact with the agent"""
+# Tool descriptions are rendered once and observations trimmed to fit the prompt
+prompt_budget = PromptBudget()
+
+MODEL_NAME = "gpt-4"
+
+# The LLM stack is imported and built on first use, so the tools and the
+# fast path below work without LangChain or an OpenAI key
+_llm = None
+_agent_executor = None
+_agent_lock = threading.RLock()
+
+def get_llm():
+    """Return the shared GPT-4 chat model"""
+    global _llm
+    with _agent_lock:
+        if _llm is None:
+            from langchain_openai import ChatOpenAI
+            _llm = ChatOpenAI(model=MODEL_NAME, temperature=0)
+        return _llm
+
+def get_agent_executor():
+    """Return the shared agent executor around ``get_llm()``"""
+    global _agent_executor
+    with _agent_lock:
+        if _agent_executor is None:
+            _agent_executor = build_agent_executor(get_llm())
+        return _agent_executor
+
+def build_agent_executor(llm, verbose: bool = True):
+    """Build the ReAct agent and its executor around ``llm``"""
+    from langchain.agents import Tool, AgentExecutor
+    from langchain.agents.output_parsers import ReActSingleInputOutputParser
+    from langchain.prompts import PromptTemplate
+
+    tools = [Tool(**spec) for spec in TOOL_SPECS]
+    tool_text = prompt_budget.render_tools(tools)
+    prompt = PromptTemplate(
+        template=template,
+        input_variables=["input", "chat_history", "agent_scratchpad", "tools"]
+    )
+    agent = (
+        {
+            "input": lambda x: x["input"],
+            "chat_history": lambda x: x.get("chat_history", []),
+            "agent_scratchpad": lambda x: prompt_budget.format_scratchpad(x["intermediate_steps"]),
+            "tools": lambda x: tool_text
+        }
+        | prompt
+        | prompt_budget.count_prompt
+        | llm
+        | prompt_budget.count_completion
+        | ReActSingleInputOutputParser()
+    )
+
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=verbose,
+        handle_parsing_errors=True,
+        max_iterations=3,
+        return_intermediate_steps=True,
+    )
+
+# Repeated questions are answered from the cache; selections and payments never are
+response_cache = AgentResponseCache(normalize=True, side_effect_tools={"SelectConcert", "ProcessPayment"})
+
+def cache_fingerprint() -> str:
+    """Fingerprint of the data the tools read, for the response cache"""
+    # The concert catalog is fixed at startup, so its size is enough
+    return str(len(concert_index))
+
+# Unambiguous inputs are answered directly; everything else goes to the agent
+intent_router = IntentRouter()
+intent_router.add("select", r"#?(\d+)", select_concert_by_number)
+intent_router.add("list", LIST_PATTERN, list_available_concerts)
+intent_router.add("nearby", r"([^\W\d][^,]*),\s*(\d{4}-\d{2}-\d{2})",
+                  lambda city, date_str: find_nearby_concerts(f"{city}, {date_str}"))
+
+# Recent turns verbatim plus a summary of older ones, per conversation
+conversations = SessionMemoryStore()
+
+def stream_to(printer: TurnPrinter):
+    """Run an agent turn, streaming tool calls and answer tokens to ``printer``"""
+    return lambda executor, inputs: stream_agent_turn(
+        executor, inputs, printer, on_action=printer.action, on_observation=printer.observation
+    )
+
+def chat_with_agent(user_input: str, printer: Optional[TurnPrinter] = None, session_id: str = "cli"):
+    """Function to interact with the agent; with a printer the turn is streamed to it"""
     try:
-        response = agent_executor.invoke({
-            "input": user_input,
-            "chat_history": []
-        })
-        return response["output"]
+        memory = conversations.get(session_id)
+
+        # Numbers, "list" and "city, date" skip the LLM entirely
+        answer = intent_router.route(user_input)
+        if answer is None:
+            with prompt_budget.turn() as usage:
+                response = response_cache.invoke(get_agent_executor(), {
+                    "input": user_input,
+                    "chat_history": memory.render()
+                }, model=MODEL_NAME, fingerprint=cache_fingerprint(),
+                    run=stream_to(printer) if printer is not None else None)
+            if printer is not None:
+                printer.usage = usage
+            answer = response["output"]
+
+        # Later turns see this one, so the agent need not list or search again
+        memory.add(user_input, answer)
+        return answer
     except Exception as e:
         return "I apologize, but I encountered an error. Please enter a number between 1-5 to select a concert from the list."
 
 if __name__ == "__main__":
+    # Stream tool calls and answer tokens as they arrive; --no-stream prints whole answers
+    streaming = "--no-stream" not in sys.argv
     print("Welcome to the Concert Booking Assistant!")
     print("Here are the available concerts:\n")
     print(list_available_concerts())
@@ -192,5 +283,14 @@ if __name__ == "__main__":
             print("Thank you for using the Concert Booking Assistant. Goodbye!")
             break
             
-        response = chat_with_agent(user_input)
-        print(f"\nAssistant: {response}")
+        if not streaming:
+            response = chat_with_agent(user_input)
+            print(f"\nAssistant: {response}")
+            continue
+
+        printer = TurnPrinter()
+        response = chat_with_agent(user_input, printer)
+        if not printer.tokens:
+            # Routed, cached and error answers arrive whole
+            printer(response)
+        printer.finish()
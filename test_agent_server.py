@@ -0,0 +1,56 @@
+import asyncio
+import json
+from agent_server import build_server
+from agent_client import post
+
+# The same order, placed by two different shoppers
+ORDER = {"event_id": "1", "section": "A1", "quantity": 1, "total_price": 350.0}
+
+async def place_orders(port: int, orders_per_session: list) -> list:
+    """Open one session per entry and send it that many copies of ORDER"""
+    replies = []
+    for count in orders_per_session:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            session_id = (await post(reader, writer, "/sessions", {"agent": "ticket_gpt4"}))["session_id"]
+            for _ in range(count):
+                replies.append(await post(reader, writer, f"/sessions/{session_id}/messages",
+                                          {"message": json.dumps(ORDER)}))
+        finally:
+            writer.close()
+            await writer.wait_closed()
+    return replies
+
+def test_sessions_pay_for_their_own_orders():
+    """Two sessions placing the same order both pay; a repeat within one session does not"""
+    # Purchase JSON is answered by the router, so no LLM is built or needed
+    server = build_server(["ticket_gpt4"])
+    agent = server.services["ticket_gpt4"].module
+
+    # Count payments the agent actually dispatches
+    payments = []
+    dispatch = agent.dispatch_payment_settled
+    agent.dispatch_payment_settled = lambda ticket_info: payments.append(ticket_info) or dispatch(ticket_info)
+
+    async def run():
+        port = await server.start(port=0)
+        try:
+            return await place_orders(port, [2, 1])
+        finally:
+            await server.close()
+
+    try:
+        replies = asyncio.run(run())
+    finally:
+        agent.dispatch_payment_settled = dispatch
+
+    assert all(reply["source"] == "router" for reply in replies), replies
+    assert all("Purchase successful" in reply["reply"] for reply in replies), replies
+    assert len(payments) == 2, f"Expected one payment per session, got {len(payments)}"
+    print("\nEach session paid for its own order once")
+
+if __name__ == "__main__":
+    print("\n=== Testing Agent Server Purchases ===")
+
+    test_sessions_pay_for_their_own_orders()
+    print("\nAll agent server tests passed")
@@ -0,0 +1,149 @@
+import asyncio
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+import ticket_agent_gpt4 as agent
+
+# Compares the two agent modes. With OPENAI_API_KEY set it runs on the real
+# model; with --fake (or without a key) it runs offline on a scripted model
+# that needs the same lookups in both modes, so the difference in LLM calls,
+# parse errors and latency comes from the agent loop alone.
+
+# Read-only questions, so the benchmark never pays for tickets
+QUESTIONS = [
+    "What concerts are available?",
+    "Tell me about the Taylor Swift show",
+    "Compare the ticket prices of events 1 and 2",
+    "Which is cheaper, the cheapest Taylor Swift seat or the cheapest Ed Sheeran seat?",
+]
+
+# Tool calls the scripted model makes to answer each question
+FAKE_PLANS: Dict[str, List[Tuple[str, Dict[str, str]]]] = {
+    QUESTIONS[0]: [("SearchTickets", {"query": "all"})],
+    QUESTIONS[1]: [("SearchTickets", {"query": "Taylor Swift"})],
+    QUESTIONS[2]: [("GetTicketDetails", {"event_id": "1"}), ("GetTicketDetails", {"event_id": "2"})],
+    QUESTIONS[3]: [("SearchTickets", {"query": "Taylor Swift"}), ("SearchTickets", {"query": "Ed Sheeran"})],
+}
+
+# Seconds per scripted LLM call, and how often a ReAct step breaks the text format.
+# The format error rate is an assumption, not a measurement of GPT-4
+FAKE_LATENCY = 0.2
+FAKE_FORMAT_ERROR_RATE = 0.1
+
+def build_fake_llm(mode: str, seed: int = 0, latency: float = FAKE_LATENCY,
+                   format_error_rate: float = FAKE_FORMAT_ERROR_RATE):
+    """Scripted chat model: follows FAKE_PLANS, one tool per ReAct step or all at once with tools"""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, ToolMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    rng = random.Random(seed)
+
+    class ScriptedAgentLLM(BaseChatModel):
+        model_name: str = f"scripted-{mode}"
+
+        @property
+        def _llm_type(self) -> str:
+            return "scripted-agent"
+
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            time.sleep(latency)
+            return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            await asyncio.sleep(latency)
+            return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+        @staticmethod
+        def _respond(messages) -> AIMessage:
+            if mode == "tools":
+                question = next(message.content for message in messages if message.type == "human")
+                if any(isinstance(message, ToolMessage) for message in messages):
+                    return AIMessage(content="Here is what I found.")
+                # Independent lookups are requested together in one response
+                return AIMessage(content="", tool_calls=[
+                    {"name": name, "args": args, "id": f"call_{i}"}
+                    for i, (name, args) in enumerate(FAKE_PLANS[question])
+                ])
+
+            # ReAct: the question and scratchpad follow the last "Question:" of the prompt
+            question, _, scratchpad = str(messages[-1].content).rpartition("Question: ")[2].partition("\n")
+            plan = FAKE_PLANS[question.strip()]
+            # Steps that parsed; a parse error's log quotes 'Action Input:' mid-line
+            done = len(re.findall(r"^Action Input:", scratchpad, re.MULTILINE))
+            if done >= len(plan):
+                return AIMessage(content="Thought: I have what I need\nFinal Answer: Here is what I found.")
+            name, args = plan[done]
+            if rng.random() < format_error_rate:
+                # A typical slip: the action without its input line
+                return AIMessage(content=f"Thought: I should use {name}\nAction: {name}\n")
+            return AIMessage(content=f"Thought: I should use {name}\nAction: {name}\n"
+                                     f"Action Input: {next(iter(args.values()))}\n")
+
+    return ScriptedAgentLLM()
+
+async def run_turn(executor, question: str) -> Dict[str, Any]:
+    """One agent turn with its latency, LLM calls, tool calls and parse failures"""
+    with agent.prompt_budget.turn() as usage:
+        start = time.perf_counter()
+        response = await executor.ainvoke({"input": question, "chat_history": ""})
+        elapsed = time.perf_counter() - start
+
+    steps = response.get("intermediate_steps", [])
+    # handle_parsing_errors records malformed model output as an "_Exception" step
+    parse_errors = sum(1 for action, _ in steps if action.tool == "_Exception")
+    return {
+        "latency": elapsed,
+        "llm_calls": usage.llm_calls,
+        "tool_calls": len(steps) - parse_errors,
+        "parse_errors": parse_errors,
+        "tokens": usage.total_tokens,
+        "estimated": not usage.reported,
+        "answered": "Agent stopped" not in response.get("output", ""),
+    }
+
+async def bench(mode: str, runs: int, fake: bool) -> List[Dict[str, Any]]:
+    llm = build_fake_llm(mode) if fake else agent.get_llm()
+    executor = agent.build_agent_executor(llm, verbose=False, mode=mode)
+    results = []
+    for _ in range(runs):
+        for question in QUESTIONS:
+            results.append(await run_turn(executor, question))
+    return results
+
+def report(mode: str, results: List[Dict[str, Any]]):
+    count = len(results)
+    def mean(field: str) -> float:
+        return sum(result[field] for result in results) / count
+
+    latencies = sorted(result["latency"] for result in results)
+    print(f"\n{mode}: {count} turns")
+    print(f"  latency mean/p50/max: {mean('latency'):.2f} / {latencies[count // 2]:.2f} / {latencies[-1]:.2f} s")
+    print(f"  LLM calls per turn:   {mean('llm_calls'):.2f}")
+    print(f"  tool calls per turn:  {mean('tool_calls'):.2f}")
+    print(f"  parse errors:         {sum(result['parse_errors'] for result in results)}")
+    # Without provider-reported usage, tokens are counted locally from the prompt, text and tool calls
+    estimated = " (estimated)" if any(result["estimated"] for result in results) else ""
+    print(f"  tokens per turn:      {mean('tokens'):.0f}{estimated}")
+    print(f"  answered:             {sum(result['answered'] for result in results)}/{count}")
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    runs = int(args[0]) if args else 3
+    fake = "--fake" in sys.argv or not agent.OPENAI_API_KEY
+
+    if fake:
+        print(f"ReAct vs function calling on a scripted model ({FAKE_LATENCY * 1000:.0f} ms/call, "
+              f"{FAKE_FORMAT_ERROR_RATE:.0%} ReAct format errors), {runs} run(s) of {len(QUESTIONS)} questions")
+    else:
+        print(f"ReAct vs function calling on {agent.MODEL_NAME}, {runs} run(s) of {len(QUESTIONS)} questions")
+    for mode in agent.AGENT_MODES:
+        report(mode, asyncio.run(bench(mode, runs, fake)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+class EventStore:
+    """In-process store of events, indexed by ID, venue and date.
+
+    Every search adds the events it returns, so detail lookups become a dict
+    lookup instead of another API call or a scan. Each event remembers when
+    it was last added; ``is_stale`` reports events older than ``max_age``
+    seconds so callers can decide to refresh them. Events added with
+    ``pinned=True`` (fixed sample data) never go stale. Listeners registered with
+    ``subscribe`` are called with each added event, for indexes built on
+    top of the store. ``version`` changes whenever an added event differs
+    from the stored one, so callers can tell when their view is out of date.
+    """
+
+    def __init__(self, max_age: float = 900):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._events: Dict[str, Dict[str, Any]] = {}
+        self._updated_at: Dict[str, float] = {}
+        self._pinned: Set[str] = set()
+        self._by_venue: Dict[str, Set[str]] = {}
+        self._by_date: Dict[str, Set[str]] = {}
+        self._dates: List[str] = []
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self.version = 0
+
+    def add(self, event: Dict[str, Any], pinned: bool = False):
+        """Add or replace an event; a pinned event is never reported stale"""
+        event_id = str(event["id"])
+        with self._lock:
+            if pinned:
+                self._pinned.add(event_id)
+            else:
+                self._pinned.discard(event_id)
+            previous = self._events.get(event_id)
+            if previous is not None:
+                self._unindex(event_id, previous)
+            if previous != event:
+                self.version += 1
+
+            self._events[event_id] = event
+            self._updated_at[event_id] = time.time()
+
+            self._by_venue.setdefault(_venue_key(event.get("venue")), set()).add(event_id)
+            date = event.get("date")
+            if date:
+                if date not in self._by_date:
+                    insort(self._dates, date)
+                self._by_date.setdefault(date, set()).add(event_id)
+
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            listener(event)
+
+    def add_many(self, events: Iterable[Dict[str, Any]], pinned: bool = False):
+        for event in events:
+            self.add(event, pinned)
+
+    def get(self, event_id: str) -> Optional[Dict[str, Any]]:
+        """Look up an event by ID"""
+        with self._lock:
+            return self._events.get(str(event_id))
+
+    def is_stale(self, event_id: str) -> bool:
+        """Whether an event is missing or older than max_age"""
+        with self._lock:
+            if str(event_id) in self._pinned:
+                return False
+            updated_at = self._updated_at.get(str(event_id))
+        return updated_at is None or time.time() - updated_at > self.max_age
+
+    def by_venue(self, venue: str) -> List[Dict[str, Any]]:
+        """Events at a venue (case-insensitive), ordered by date"""
+        with self._lock:
+            events = [self._events[event_id] for event_id in self._by_venue.get(_venue_key(venue), ())]
+        return sorted(events, key=lambda event: (event.get("date") or "", event.get("time") or ""))
+
+    def between(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Events dated from start_date to end_date inclusive (YYYY-MM-DD), ordered by date"""
+        with self._lock:
+            dates = self._dates[bisect_left(self._dates, start_date):bisect_right(self._dates, end_date)]
+            events = [self._events[event_id] for date in dates for event_id in self._by_date[date]]
+        return sorted(events, key=lambda event: (event["date"], event.get("time") or ""))
+
+    def on_date(self, date: str) -> List[Dict[str, Any]]:
+        """Events on a single date (YYYY-MM-DD)"""
+        return self.between(date, date)
+
+    def all(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._events.values())
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], None], replay: bool = True):
+        """Call ``listener`` for every added event, starting with the current ones if ``replay``"""
+        with self._lock:
+            self._listeners.append(listener)
+            existing = list(self._events.values()) if replay else []
+        for event in existing:
+            listener(event)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __contains__(self, event_id: str) -> bool:
+        return str(event_id) in self._events
+
+    def _unindex(self, event_id: str, event: Dict[str, Any]):
+        venue_ids = self._by_venue.get(_venue_key(event.get("venue")))
+        if venue_ids is not None:
+            venue_ids.discard(event_id)
+
+        date = event.get("date")
+        date_ids = self._by_date.get(date)
+        if date_ids is not None:
+            date_ids.discard(event_id)
+            if not date_ids:
+                del self._by_date[date]
+                del self._dates[bisect_left(self._dates, date)]
+
+def _venue_key(venue: Optional[str]) -> str:
+    return (venue or "").strip().lower()
@@ -0,0 +1,240 @@
+import threading
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# Column dtypes; prices in cents keep filters exact
+COLUMNS = {
+    "event": np.int32,
+    "price_cents": np.int64,
+    "quantity": np.int32,
+    "date": np.int32,
+    "venue": np.int32,
+    "artist": np.int32,
+    "section": np.int32,
+    "row": np.int32,
+    "live": np.bool_,
+}
+
+# Rows to reserve up front; capacity doubles as rows are added
+INITIAL_CAPACITY = 1024
+
+# Share of rows that may be retired before the columns are compacted
+COMPACT_RATIO = 0.5
+
+class _Interner:
+    """Maps strings to dense integer IDs and back"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def intern(self, value: str) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+def _event_version(event: Dict[str, Any], tickets) -> Tuple:
+    """The fields of an event that its inventory rows hold"""
+    return (
+        event.get("date"), event.get("venue"), event.get("artist"),
+        tuple((ticket.get("price"), ticket.get("quantity"), ticket.get("section"), ticket.get("row"))
+              for ticket in tickets),
+    )
+
+class TicketInventory:
+    """Columnar ticket inventory for vectorized filtering and ranking.
+
+    Each ticket offer (one entry of an event's ``available_tickets``) is a
+    row across NumPy columns for price, quantity, date ordinal and interned
+    venue/artist/section/row IDs. Filters such as "under $X, within N days,
+    at least Q seats" are boolean masks over whole columns, and ``top_k``
+    ranks matches with a partial sort instead of sorting the catalog.
+    Re-adding an unchanged event is a no-op. Re-adding a changed event
+    retires its old rows; once more than ``COMPACT_RATIO`` of the rows are
+    retired, ``compact`` drops them, so repeated refreshes keep memory flat.
+    """
+
+    def __init__(self, events: Iterable[Dict[str, Any]] = ()):
+        self._lock = threading.Lock()
+        self._size = 0
+        self._columns = {name: np.zeros(INITIAL_CAPACITY, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._event_ids = _Interner()
+        self._strings = _Interner()
+        self._event_rows: Dict[int, List[int]] = {}
+        # Event ID -> the fields its rows were built from, to skip unchanged re-adds
+        self._event_versions: Dict[int, Tuple] = {}
+        self._retired = 0
+        self.add_many(events)
+
+    def add_event(self, event: Dict[str, Any]):
+        """Add an event's tickets, replacing any earlier version of the event"""
+        self.add_many([event])
+
+    def add_many(self, events: Iterable[Dict[str, Any]]):
+        """Add many events, writing each column once"""
+        with self._lock:
+            new = {name: [] for name in COLUMNS if name != "live"}
+            intern = self._strings.intern
+            for event in events:
+                event_id = self._event_ids.intern(str(event["id"]))
+                tickets = event.get("available_tickets") or ()
+                version = _event_version(event, tickets)
+                if self._event_versions.get(event_id) == version:
+                    # Store listeners re-add events on every fetch; most have not changed
+                    continue
+                self._event_versions[event_id] = version
+
+                # Retire the rows of an earlier version of this event
+                for row in self._event_rows.pop(event_id, ()):
+                    if row < self._size:
+                        self._columns["live"][row] = False
+                    else:
+                        new["event"][row - self._size] = -1
+                    self._retired += 1
+
+                ordinal = date.fromisoformat(event["date"]).toordinal() if event.get("date") else 0
+                venue = intern(event.get("venue") or "")
+                artist = intern(event.get("artist") or "")
+                first = self._size + len(new["event"])
+                self._event_rows[event_id] = list(range(first, first + len(tickets)))
+                for ticket in tickets:
+                    new["event"].append(event_id)
+                    new["price_cents"].append(round(float(ticket.get("price") or 0) * 100))
+                    new["quantity"].append(int(ticket.get("quantity") or 0))
+                    new["date"].append(ordinal)
+                    new["venue"].append(venue)
+                    new["artist"].append(artist)
+                    new["section"].append(intern(str(ticket.get("section", ""))))
+                    new["row"].append(intern(str(ticket.get("row", ""))))
+
+            count = len(new["event"])
+            if not count:
+                return
+            self._reserve(self._size + count)
+            rows = slice(self._size, self._size + count)
+            for name, values in new.items():
+                self._columns[name][rows] = values
+            # Rows of events replaced within this batch were marked with event -1
+            self._columns["live"][rows] = self._columns["event"][rows] >= 0
+            self._size += count
+
+            if self._retired > COMPACT_RATIO * self._size:
+                self._compact()
+
+    def filter(self, max_price: Optional[float] = None, min_price: Optional[float] = None,
+               start_date: Optional[str] = None, end_date: Optional[str] = None,
+               within_days: Optional[int] = None, today: Optional[date] = None,
+               min_quantity: int = 1, venue: Optional[str] = None, artist: Optional[str] = None) -> np.ndarray:
+        """Row numbers of the tickets matching every given condition"""
+        with self._lock:
+            return np.flatnonzero(self._mask(max_price, min_price, start_date, end_date, within_days,
+                                             today, min_quantity, venue, artist))
+
+    def top_k(self, k: int = 10, by: str = "price", descending: bool = False, **filters) -> List[Dict[str, Any]]:
+        """Best ``k`` matching tickets ordered by ``by`` ("price", "date" or "quantity")"""
+        column = {"price": "price_cents", "date": "date", "quantity": "quantity"}[by]
+        with self._lock:
+            rows = np.flatnonzero(self._mask(**filters))
+            if not len(rows):
+                return []
+            values = self._columns[column][rows]
+            if descending:
+                values = -values
+            # Partial sort: only the first k are ordered
+            if len(rows) > k:
+                best = np.argpartition(values, k - 1)[:k]
+                rows, values = rows[best], values[best]
+            return self._rows(rows[np.argsort(values, kind="stable")])
+
+    def rows(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        """Ticket dicts for row numbers returned by ``filter``"""
+        with self._lock:
+            return self._rows(rows)
+
+    def compact(self):
+        """Drop the rows of replaced events to reclaim memory"""
+        with self._lock:
+            self._compact()
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the columns"""
+        return sum(column.nbytes for column in self._columns.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._columns["live"][:self._size].sum())
+
+    @property
+    def retired(self) -> int:
+        """Rows of replaced events still held in the columns"""
+        return self._retired
+
+    def _compact(self):
+        live = np.flatnonzero(self._columns["live"][:self._size])
+        capacity = max(INITIAL_CAPACITY, len(live))
+        for name, dtype in COLUMNS.items():
+            column = np.zeros(capacity, dtype=dtype)
+            column[:len(live)] = self._columns[name][live]
+            self._columns[name] = column
+        self._size = len(live)
+        self._retired = 0
+
+        self._event_rows = {}
+        for row, event in enumerate(self._columns["event"][:self._size].tolist()):
+            self._event_rows.setdefault(event, []).append(row)
+
+    def _reserve(self, size: int):
+        capacity = len(self._columns["live"])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def _mask(self, max_price=None, min_price=None, start_date=None, end_date=None, within_days=None,
+              today=None, min_quantity=1, venue=None, artist=None) -> np.ndarray:
+        columns = {name: column[:self._size] for name, column in self._columns.items()}
+        mask = columns["live"].copy()
+        if max_price is not None:
+            mask &= columns["price_cents"] <= round(max_price * 100)
+        if min_price is not None:
+            mask &= columns["price_cents"] >= round(min_price * 100)
+        if min_quantity:
+            mask &= columns["quantity"] >= min_quantity
+        if start_date:
+            mask &= columns["date"] >= date.fromisoformat(start_date).toordinal()
+        if end_date:
+            mask &= columns["date"] <= date.fromisoformat(end_date).toordinal()
+        if within_days is not None:
+            start = (today or date.today()).toordinal()
+            mask &= (columns["date"] >= start) & (columns["date"] <= start + within_days)
+        for name, value in (("venue", venue), ("artist", artist)):
+            if value is not None:
+                value_id = self._strings.ids.get(value)
+                if value_id is None:
+                    return np.zeros(self._size, dtype=np.bool_)
+                mask &= columns[name] == value_id
+        return mask
+
+    def _rows(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        columns, strings = self._columns, self._strings.values
+        return [
+            {
+                "event_id": self._event_ids.values[columns["event"][row]],
+                "artist": strings[columns["artist"][row]],
+                "venue": strings[columns["venue"][row]],
+                "date": date.fromordinal(int(columns["date"][row])).isoformat() if columns["date"][row] else None,
+                "section": strings[columns["section"][row]],
+                "row": strings[columns["row"][row]],
+                "price": int(columns["price_cents"][row]) / 100,
+                "quantity": int(columns["quantity"][row]),
+            }
+            for row in rows
+        ]
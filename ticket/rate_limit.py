@@ -0,0 +1,81 @@
+import random
+import threading
+import time
+from typing import Mapping, Optional
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` requests per second, bursts of ``capacity``.
+
+    ``acquire`` blocks until a token is available, so bursts queue briefly
+    instead of being rejected by the API. ``pause_until`` empties the bucket
+    until a deadline, for when the server says the quota is used up.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting up to ``timeout`` seconds; return False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._refill(now)
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+
+            if deadline is not None:
+                if time.monotonic() + wait > deadline:
+                    return False
+            time.sleep(wait)
+
+    def pause_until(self, deadline: float):
+        """Hand out no tokens until ``deadline`` (a time.monotonic() value)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, deadline)
+            self._tokens = 0
+            self._updated = max(self._updated, deadline)
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for retry ``attempt`` (0-based)"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds the server asks us to wait, from Retry-After or Ticketmaster's Rate-Limit-Reset"""
+    retry_after = headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            # HTTP-date form; email.utils is slow to import, so only load it here
+            from email.utils import parsedate_to_datetime
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    # Ticketmaster reports when the quota resets as epoch milliseconds
+    reset = headers.get("Rate-Limit-Reset")
+    if reset:
+        try:
+            return max(0.0, int(reset) / 1000 - time.time())
+        except ValueError:
+            pass
+    return None
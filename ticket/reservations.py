@@ -0,0 +1,184 @@
+import heapq
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# How long a hold keeps seats out of stock while payment runs
+DEFAULT_HOLD_SECONDS = 300
+
+# Hold for a payment settled on chain: covers its send retries and confirmation checks
+SETTLEMENT_HOLD_SECONDS = 1800
+
+class ReservationError(Exception):
+    """A hold cannot be taken, committed or released"""
+
+class _Stripe:
+    """One lock and the stock, holds and expiry heap of the events hashed to it"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (event_id, section) -> seats neither held nor sold
+        self.available: Dict[Tuple[str, str], int] = {}
+        # hold_id -> (event_id, section, quantity, expires_at)
+        self.holds: Dict[str, Tuple[str, str, int, float]] = {}
+        self.expiry: List[Tuple[float, str]] = []
+
+class ReservationEngine:
+    """Seat holds with expiry, so concurrent buyers cannot oversell a section.
+
+    A purchase first takes a hold on ``quantity`` seats of a section, which
+    removes them from stock for ``hold_seconds``. Once payment finishes the
+    hold is committed (seats are sold) or released (seats return to stock);
+    holds that are neither go back to stock when they expire. Events are
+    spread over ``stripes`` independent locks by ID, so buyers of different
+    events rarely wait on each other.
+    """
+
+    def __init__(self, stripes: int = 64, hold_seconds: float = DEFAULT_HOLD_SECONDS):
+        self.hold_seconds = hold_seconds
+        self._stripes = [_Stripe() for _ in range(stripes)]
+
+    def load_event(self, event: Dict[str, Any]):
+        """Stock an event's sections from ``available_tickets``.
+
+        Sections already known keep their stock, so refreshing an event from
+        the API does not undo seats that were held or sold here.
+        """
+        event_id = str(event["id"])
+        stripe = self._stripe_for(event_id)
+        with stripe.lock:
+            for ticket in event.get("available_tickets") or ():
+                stripe.available.setdefault((event_id, str(ticket["section"])), int(ticket.get("quantity") or 0))
+
+    def set_available(self, event_id: str, section: str, quantity: int):
+        """Set a section's free seats outright"""
+        event_id = str(event_id)
+        stripe = self._stripe_for(event_id)
+        with stripe.lock:
+            stripe.available[(event_id, str(section))] = quantity
+
+    def available(self, event_id: str, section: str) -> Optional[int]:
+        """Free seats in a section, or None if the section is unknown"""
+        event_id = str(event_id)
+        stripe = self._stripe_for(event_id)
+        with stripe.lock:
+            self._expire(stripe, time.monotonic())
+            return stripe.available.get((event_id, str(section)))
+
+    def hold(self, event_id: str, section: str, quantity: int, hold_seconds: Optional[float] = None) -> str:
+        """Take ``quantity`` seats out of stock and return the hold ID"""
+        if quantity <= 0:
+            raise ReservationError("Quantity must be positive")
+        event_id, section = str(event_id), str(section)
+        index = self._stripe_index(event_id)
+        stripe = self._stripes[index]
+        now = time.monotonic()
+        # The stripe is part of the ID so commit/release find it without a lookup
+        hold_id = f"{index}.{uuid.uuid4().hex}"
+        expires_at = now + (self.hold_seconds if hold_seconds is None else hold_seconds)
+
+        with stripe.lock:
+            self._expire(stripe, now)
+            key = (event_id, section)
+            available = stripe.available.get(key)
+            if available is None:
+                raise ReservationError(f"Unknown section {section} for event {event_id}")
+            if available < quantity:
+                raise ReservationError(f"Only {available} seats left in section {section}")
+            stripe.available[key] = available - quantity
+            stripe.holds[hold_id] = (event_id, section, quantity, expires_at)
+            heapq.heappush(stripe.expiry, (expires_at, hold_id))
+        return hold_id
+
+    def commit(self, hold_id: str):
+        """Mark a hold's seats as sold"""
+        stripe = self._stripe_for_hold(hold_id)
+        with stripe.lock:
+            self._expire(stripe, time.monotonic())
+            if stripe.holds.pop(hold_id, None) is None:
+                raise ReservationError("Hold not found or expired")
+
+    def release(self, hold_id: str) -> bool:
+        """Return a hold's seats to stock; False if it was already gone"""
+        stripe = self._stripe_for_hold(hold_id)
+        with stripe.lock:
+            hold = stripe.holds.pop(hold_id, None)
+            if hold is None:
+                return False
+            event_id, section, quantity, _ = hold
+            stripe.available[(event_id, section)] += quantity
+            return True
+
+    @contextmanager
+    def reserve(self, event_id: str, section: str, quantity: int):
+        """Hold seats for the ``with`` block; commit if it succeeds, release if it raises"""
+        hold_id = self.hold(event_id, section, quantity)
+        try:
+            yield hold_id
+        except BaseException:
+            self.release(hold_id)
+            raise
+        self.commit(hold_id)
+
+    def commit_when(self, hold_id: str, paid: Future):
+        """Commit a hold once ``paid`` resolves True; release it if it resolves False or fails"""
+        def on_done(future: Future):
+            try:
+                succeeded = future.result()
+            except Exception as e:
+                logger.error(f"Payment for hold {hold_id} failed: {e}")
+                succeeded = False
+            if not succeeded:
+                self.release(hold_id)
+                return
+            try:
+                self.commit(hold_id)
+            except ReservationError:
+                # The seats went back to stock before the payment settled
+                logger.error(f"Payment for hold {hold_id} settled after the hold expired")
+
+        paid.add_done_callback(on_done)
+
+    def expire(self) -> int:
+        """Release every expired hold now; returns how many were released"""
+        now = time.monotonic()
+        released = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                released += self._expire(stripe, now)
+        return released
+
+    def held(self) -> int:
+        """Number of open holds"""
+        return sum(len(stripe.holds) for stripe in self._stripes)
+
+    @staticmethod
+    def _expire(stripe: _Stripe, now: float) -> int:
+        released = 0
+        while stripe.expiry and stripe.expiry[0][0] <= now:
+            _, hold_id = heapq.heappop(stripe.expiry)
+            # Committed and released holds leave their heap entry behind
+            hold = stripe.holds.pop(hold_id, None)
+            if hold is not None:
+                event_id, section, quantity, _ = hold
+                stripe.available[(event_id, section)] += quantity
+                released += 1
+        return released
+
+    def _stripe_index(self, event_id: str) -> int:
+        return hash(event_id) % len(self._stripes)
+
+    def _stripe_for(self, event_id: str) -> _Stripe:
+        return self._stripes[self._stripe_index(event_id)]
+
+    def _stripe_for_hold(self, hold_id: str) -> _Stripe:
+        try:
+            return self._stripes[int(hold_id.split(".", 1)[0])]
+        except (ValueError, IndexError):
+            raise ReservationError("Hold not found or expired")
@@ -0,0 +1,142 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Request params that do not change the response
+IGNORED_PARAMS = {"apikey"}
+
+# Seconds a response stays fresh, by endpoint (matched on the end of the URL path)
+DEFAULT_TTLS = {
+    "events.json": 300,
+    "venues.json": 86400,
+    "attractions.json": 86400,
+    "classifications.json": 86400,
+}
+
+class ResponseCache:
+    """TTL + LRU cache for Ticketmaster API responses.
+
+    Entries are keyed on the endpoint and normalized request params (sorted,
+    stringified, API key removed) and stored as JSON bytes, so the memory
+    tier can be bounded by size; the least recently used entries are evicted
+    once ``max_bytes`` is exceeded. With ``disk_path`` set, responses are
+    also written to a SQLite file that backs memory misses and survives
+    restarts.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, default_ttl: float = 300,
+                 ttls: Optional[Dict[str, float]] = None, disk_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._disk = None
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, isolation_level=None, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, body BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def make_key(url: str, params: Dict[str, Any]) -> str:
+        """Cache key for a request, independent of param order and API key"""
+        normalized = sorted(
+            (str(name), str(value)) for name, value in (params or {}).items()
+            if name not in IGNORED_PARAMS and value is not None
+        )
+        return json.dumps([url, normalized])
+
+    def ttl_for(self, url: str) -> float:
+        """TTL of the endpoint a URL points at"""
+        path = url.split("?", 1)[0]
+        for suffix, ttl in self.ttls.items():
+            if path.endswith(suffix):
+                return ttl
+        return self.default_ttl
+
+    def get(self, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return a fresh cached response, or None"""
+        key = self.make_key(url, params)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                body, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return json.loads(body)
+                self._discard(key)
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT body, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._store(key, row[0], row[1])
+                    self._stats["disk_hits"] += 1
+                    return json.loads(row[0])
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, url: str, params: Dict[str, Any], data: Dict[str, Any]):
+        """Cache a successful response"""
+        key = self.make_key(url, params)
+        body = json.dumps(data).encode()
+        expires_at = time.time() + self.ttl_for(url)
+        with self._lock:
+            self._store(key, body, expires_at)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO responses (key, body, expires_at) VALUES (?, ?, ?)",
+                    (key, body, expires_at)
+                )
+
+    def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": (self._stats["hits"] + self._stats["disk_hits"]) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _store(self, key: str, body: bytes, expires_at: float):
+        self._discard(key)
+        if len(body) > self.max_bytes:
+            logger.warning(f"Response of {len(body)} bytes is larger than the cache; not cached in memory")
+            return
+        self._entries[key] = (body, expires_at)
+        self._bytes += len(body)
+        while self._bytes > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self._stats["evictions"] += 1
+
+    def _discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
@@ -0,0 +1,108 @@
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Event fields that are searchable, with the weight of a match in each
+SEARCH_FIELDS = {"artist": 3.0, "name": 3.0, "venue": 2.0, "city": 2.0, "description": 1.0}
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Cap on how many indexed tokens a partial query term expands to
+MAX_PREFIX_EXPANSIONS = 50
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+class SearchIndex:
+    """In-memory inverted index over events for ranked full-text search.
+
+    Each token maps to a posting list of {event_id: weighted term frequency}.
+    Terms are ORed: a query scores every event in any of its terms'
+    posting lists (TF-IDF), so events matching more and rarer terms rank
+    first, and lookups cost the size of those lists rather than the catalog.
+    Events can be added or replaced one at a time; a query term with no
+    exact match is expanded to the indexed tokens it is a prefix of.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._doc_tokens: Dict[str, List[str]] = {}
+        self._events: Dict[str, Dict[str, Any]] = {}
+        self._vocabulary: Optional[List[str]] = None
+
+    def add(self, event: Dict[str, Any]):
+        """Index an event, replacing any earlier version with the same ID"""
+        event_id = str(event["id"])
+        weights = Counter()
+        for field, weight in SEARCH_FIELDS.items():
+            value = event.get(field)
+            if value:
+                for token in tokenize(str(value)):
+                    weights[token] += weight
+
+        with self._lock:
+            self._remove(event_id)
+            for token, weight in weights.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    self._vocabulary = None
+                postings[event_id] = weight
+            self._doc_tokens[event_id] = list(weights)
+            self._events[event_id] = event
+
+    def remove(self, event_id: str):
+        with self._lock:
+            self._remove(str(event_id))
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` events ranked by relevance to ``query``"""
+        return [self._events[event_id] for event_id, _ in self.search_ids(query, limit)]
+
+    def search_ids(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Return (event_id, score) pairs, best first"""
+        scores: Dict[str, float] = {}
+        with self._lock:
+            total = len(self._events)
+            tokens = {token for term in set(tokenize(query)) for token in self._expand(term)}
+
+            # Every event matching any term is a candidate, whichever terms are rarer
+            for token in tokens:
+                postings = self._postings[token]
+                idf = math.log(1 + total / len(postings))
+                for event_id, weight in postings.items():
+                    scores[event_id] = scores.get(event_id, 0.0) + idf * (1 + math.log(weight))
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def _expand(self, term: str) -> List[str]:
+        if term in self._postings:
+            return [term]
+        # No exact match: use every indexed token the term is a prefix of
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        matches = []
+        position = bisect_left(self._vocabulary, term)
+        while position < len(self._vocabulary) and len(matches) < MAX_PREFIX_EXPANSIONS:
+            token = self._vocabulary[position]
+            if not token.startswith(term):
+                break
+            matches.append(token)
+            position += 1
+        return matches
+
+    def _remove(self, event_id: str):
+        for token in self._doc_tokens.pop(event_id, ()):
+            postings = self._postings[token]
+            del postings[event_id]
+            if not postings:
+                del self._postings[token]
+                self._vocabulary = None
+        self._events.pop(event_id, None)
@@ -0,0 +1,54 @@
+from inventory import TicketInventory
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+REFRESHES = 5000
+
+def make_event(event_id: str, price: float = 100.0) -> dict:
+    return {
+        "id": event_id,
+        "artist": "Taylor Swift",
+        "venue": "Madison Square Garden",
+        "date": "2024-12-31",
+        "available_tickets": [
+            {"section": "A1", "row": "1", "price": price, "quantity": 4},
+            {"section": "B2", "row": "5", "price": price / 2, "quantity": 8},
+        ],
+    }
+
+def test_unchanged_refreshes_add_no_rows():
+    """Re-adding an unchanged event, as every store fetch does, leaves the columns alone"""
+    inventory = TicketInventory([make_event("1")])
+    for _ in range(REFRESHES):
+        inventory.add_event(make_event("1"))
+
+    assert len(inventory) == 2, f"Expected 2 live rows, got {len(inventory)}"
+    assert inventory._size == 2, f"Unchanged refreshes grew the columns to {inventory._size} rows"
+    print("\nUnchanged refreshes add no rows")
+
+def test_changed_refreshes_stay_bounded():
+    """Events whose prices keep changing are compacted instead of growing the columns"""
+    inventory = TicketInventory([make_event("1"), make_event("2")])
+    for i in range(REFRESHES):
+        inventory.add_event(make_event("1", price=100.0 + i))
+
+    assert len(inventory) == 4, f"Expected 4 live rows, got {len(inventory)}"
+    assert inventory._size <= 2 * len(inventory) + 2, f"{inventory._size} rows held for {len(inventory)} live"
+    assert inventory.retired <= inventory._size // 2
+    # The latest version is the one that is searched
+    prices = sorted(ticket["price"] for ticket in inventory.top_k(10, artist="Taylor Swift") if ticket["event_id"] == "1")
+    assert prices == [(100.0 + REFRESHES - 1) / 2, 100.0 + REFRESHES - 1], prices
+    print("\nChanged refreshes are compacted")
+
+if __name__ == "__main__":
+    print("\n=== Testing Ticket Inventory ===")
+
+    test_unchanged_refreshes_add_no_rows()
+    test_changed_refreshes_stay_bounded()
+    print("\nAll inventory tests passed")
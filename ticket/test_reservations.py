@@ -0,0 +1,128 @@
+from reservations import ReservationEngine, ReservationError
+from concurrent.futures import Future
+import random
+import threading
+import time
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+EVENTS = 20
+SECTIONS = ["A", "B", "C"]
+SEATS_PER_SECTION = 500
+THREADS = 16
+ATTEMPTS_PER_THREAD = 20000
+
+def test_no_oversell():
+    """Hammer a few hot sections from many threads and check every seat is accounted for"""
+    engine = ReservationEngine()
+    for event_id in range(EVENTS):
+        for section in SECTIONS:
+            engine.set_available(str(event_id), section, SEATS_PER_SECTION)
+
+    sold = {}
+    sold_lock = threading.Lock()
+    holds = [0] * THREADS
+    start = threading.Barrier(THREADS + 1)
+
+    def buyer(index: int):
+        rng = random.Random(index)
+        local_sold = {}
+        start.wait()
+        for _ in range(ATTEMPTS_PER_THREAD):
+            # Skew towards a couple of events so buyers contend for the same seats
+            event_id = str(min(int(rng.expovariate(0.5)), EVENTS - 1))
+            section = rng.choice(SECTIONS)
+            quantity = rng.randint(1, 4)
+            try:
+                hold_id = engine.hold(event_id, section, quantity)
+            except ReservationError:
+                continue
+            holds[index] += 1
+            # Most payments succeed, some fail and give the seats back
+            if rng.random() < 0.7:
+                engine.commit(hold_id)
+                key = (event_id, section)
+                local_sold[key] = local_sold.get(key, 0) + quantity
+            else:
+                engine.release(hold_id)
+        with sold_lock:
+            for key, quantity in local_sold.items():
+                sold[key] = sold.get(key, 0) + quantity
+
+    threads = [threading.Thread(target=buyer, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    attempts = THREADS * ATTEMPTS_PER_THREAD
+    print(f"\n{attempts} hold attempts ({sum(holds)} granted) from {THREADS} threads in {elapsed:.2f}s "
+          f"({attempts / elapsed:.0f} attempts/s)")
+
+    oversold = []
+    for event_id in range(EVENTS):
+        for section in SECTIONS:
+            key = (str(event_id), section)
+            left = engine.available(*key)
+            if sold.get(key, 0) > SEATS_PER_SECTION or left + sold.get(key, 0) != SEATS_PER_SECTION:
+                oversold.append((key, sold.get(key, 0), left))
+
+    assert not oversold, f"Seats oversold or lost: {oversold}"
+    assert not engine.held(), f"{engine.held()} holds left open"
+    print(f"Sold {sum(sold.values())} seats, none oversold")
+
+def test_hold_expiry():
+    """Expired holds return their seats to stock and can no longer be committed"""
+    engine = ReservationEngine(hold_seconds=0.05)
+    engine.set_available("1", "A", 4)
+
+    hold_id = engine.hold("1", "A", 4)
+    try:
+        engine.hold("1", "A", 1)
+        raise AssertionError("Held a seat from a sold-out section")
+    except ReservationError:
+        pass
+
+    time.sleep(0.1)
+    assert engine.available("1", "A") == 4, "Expired hold did not return its seats"
+    try:
+        engine.commit(hold_id)
+        raise AssertionError("Committed an expired hold")
+    except ReservationError:
+        pass
+
+    print("\nExpired holds are released")
+
+def test_commit_when_settled():
+    """Holds waiting on a payment are sold when it confirms and released when it fails"""
+    engine = ReservationEngine()
+    engine.set_available("1", "A", 4)
+
+    confirmed, failed = Future(), Future()
+    engine.commit_when(engine.hold("1", "A", 2), confirmed)
+    engine.commit_when(engine.hold("1", "A", 2), failed)
+    assert engine.available("1", "A") == 0, "Seats were not held while the payments settle"
+
+    confirmed.set_result(True)
+    failed.set_result(False)
+    assert engine.available("1", "A") == 2, "A failed payment did not return its seats"
+    assert not engine.held(), f"{engine.held()} holds left open"
+
+    print("\nHolds follow their payment's settlement")
+
+if __name__ == "__main__":
+    print("\n=== Testing Seat Reservations ===")
+
+    test_hold_expiry()
+    test_commit_when_settled()
+    test_no_oversell()
+    print("\nAll reservation tests passed")
@@ -0,0 +1,42 @@
+from search_index import SearchIndex
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+EVENTS = [
+    {"id": "1", "artist": "Taylor Swift", "venue": "Madison Square Garden", "city": "New York"},
+    {"id": "2", "artist": "Ed Sheeran", "venue": "Staples Center", "city": "Los Angeles"},
+    {"id": "3", "artist": "Taylor Swift", "venue": "Staples Center", "city": "Los Angeles"},
+    {"id": "4", "artist": "Coldplay", "venue": "Wembley Stadium", "city": "London"},
+]
+
+def build_index() -> SearchIndex:
+    index = SearchIndex()
+    for event in EVENTS:
+        index.add(event)
+    return index
+
+def test_multi_term_query_matches_any_term():
+    """Events matching only the more common term are still found"""
+    ids = [event_id for event_id, _ in build_index().search_ids("taylor ed")]
+    assert sorted(ids) == ["1", "2", "3"], ids
+    print("\nMulti-term queries match any term")
+
+def test_more_matching_terms_rank_first():
+    """An event matching every term outranks events matching only one"""
+    ids = [event_id for event_id, _ in build_index().search_ids("taylor staples")]
+    assert ids[0] == "3", ids
+    assert sorted(ids) == ["1", "2", "3"], ids
+    print("\nEvents matching more terms rank first")
+
+if __name__ == "__main__":
+    print("\n=== Testing Search Index ===")
+
+    test_multi_term_query_matches_any_term()
+    test_more_matching_terms_rank_first()
+    print("\nAll search index tests passed")
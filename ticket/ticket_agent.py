@@ -1,106 +1,167 @@
+import json
 import os
-from typing import Dict, Any
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Tuple, Union
 from dotenv import load_dotenv
-import google.generativeai as genai
-from langchain.agents import Tool, AgentExecutor
-from langchain.agents.format_scratchpad import format_log_to_str
-from langchain.agents.output_parsers import ReActSingleInputOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.tools.render import render_text_description
-from langchain.prompts import PromptTemplate
-from ticket_data import concert_tickets
+from ticket_data import event_store, search_index, get_ticket_inventory, reservations
+from reservations import SETTLEMENT_HOLD_SECONDS
+
+# Make the payment modules in the root directory importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from payment_dispatcher import dispatch_payment, dispatch_payment_settled, settled_reply
+from idempotency import get_purchase_cache, purchase_key, purchase_scope
+from agent_cache import AgentResponseCache
+from intent_router import IntentRouter, EVENT_ID_PATTERN, LIST_PATTERN
+from agent_streaming import TurnPrinter, stream_agent_turn
+from prompt_budget import PromptBudget
+from conversation_memory import SessionMemoryStore
 
 # Load environment variables
 load_dotenv()
 
-# Configure Google Gemini Pro
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
 
 def search_tickets(query: str) -> str:
     """Search available tickets based on the query"""
-    # Search through sample concert data
-    matching_events = []
-    query = query.lower()
-    
-    for event in concert_tickets["events"]:
-        # Search in event name, artist, venue, and description
-        event_text = f"{event['name']} {event['artist']} {event['venue']} {event.get('description', '')}".lower()
-        if query in event_text:
-            matching_events.append(event)
+    # Ranked full-text search over every known event
+    matching_events = search_index.search(query)
     
     if not matching_events:
         return "No matching events found."
     return str({"events": matching_events})
 
+# Filters FindTickets accepts, with how to parse each value
+TICKET_FILTERS = {
+    "max_price": float,
+    "min_price": float,
+    "start_date": str,
+    "end_date": str,
+    "within_days": int,
+    "min_quantity": int,
+    "venue": str,
+    "artist": str,
+}
+
+def find_tickets(query: str) -> str:
+    """Find the cheapest tickets matching name=value filters, e.g. max_price=200, min_quantity=2"""
+    filters = {}
+    try:
+        for part in query.split(","):
+            if not part.strip():
+                continue
+            name, value = [item.strip().strip("'\"") for item in part.split("=", 1)]
+            filters[name] = TICKET_FILTERS[name](value)
+
+        # Vectorized filter and partial sort over every known ticket offer
+        tickets = get_ticket_inventory().top_k(10, by="price", **filters)
+    except (KeyError, ValueError):
+        return f"Invalid filters. Use name=value pairs separated by commas, with names from: {', '.join(TICKET_FILTERS)}"
+
+    if not tickets:
+        return "No tickets match those filters."
+    return str({"tickets": tickets})
+
 def get_ticket_details(event_id: str) -> str:
     """Get detailed information about specific tickets"""
-    # Search through sample concert data
-    for event in concert_tickets["events"]:
-        if event["id"] == event_id:
-            return str(event)
+    # Look up the event by ID in the shared event store
+    event = event_store.get(event_id)
+    if event is not None:
+        return str(event)
     return "Event not found"
 
-def process_purchase(ticket_info: Dict[str, Any]) -> str:
-    """Process the ticket purchase by calling the transaction module"""
+# Fields every order needs before anything is paid
+ORDER_FIELDS = ("event_id", "section", "quantity", "total_price")
+
+def process_purchase(ticket_info: Union[str, Dict[str, Any]]) -> str:
+    """Process the ticket purchase on the in-process payment dispatcher"""
+    # The ReAct agent passes the order as JSON text; the router passes it parsed
+    if isinstance(ticket_info, str):
+        try:
+            ticket_info = json.loads(ticket_info)
+        except json.JSONDecodeError:
+            return f"Invalid ticket information. Provide a JSON object with {', '.join(ORDER_FIELDS)}."
+    if not isinstance(ticket_info, dict):
+        return f"Invalid ticket information. Provide a JSON object with {', '.join(ORDER_FIELDS)}."
+    missing_fields = [field for field in ORDER_FIELDS if field not in ticket_info]
+    if missing_fields:
+        return f"Missing required information: {', '.join(missing_fields)}"
+
     try:
-        # First call main.py to indicate purchase initiation
-        call_main()
-        
-        # Import the transaction module dynamically
-        import sys
-        sys.path.append('../transaction')
-        from process_transaction import process_payment
-        
-        # Call the process_payment function
-        result = process_payment(ticket_info)
-        return f"Purchase processed successfully: {result}"
+        # Pay at most once per order, however often the agent retries the tool;
+        # a pending reply is replaced once the payment settles
+        return get_purchase_cache().get_or_settle(
+            purchase_key(ticket_info),
+            lambda: pay_for_order(ticket_info)
+        )
     except Exception as e:
         return f"Error processing purchase: {str(e)}"
 
+def pay_for_order(payment_info: Dict[str, Any]) -> Tuple[str, Optional[Future]]:
+    """Pay for an order, holding its seats while the payment runs.
+
+    Returns the reply and, for an on-chain payment, a Future of the final
+    reply (None if the payment fails).
+    """
+    # Concurrent buyers cannot oversell the section; the hold is released if payment fails
+    hold_id = reservations.hold(payment_info["event_id"], payment_info["section"], int(payment_info["quantity"]),
+                                hold_seconds=SETTLEMENT_HOLD_SECONDS)
+    try:
+        result, settlement = dispatch_payment_settled(payment_info)
+    except BaseException:
+        reservations.release(hold_id)
+        raise
+
+    confirmation = f"Purchase processed successfully: {result}"
+    if settlement is None:
+        reservations.commit(hold_id)
+        return confirmation, None
+
+    # The seats are sold only once the on-chain transfer confirms
+    reservations.commit_when(hold_id, settlement)
+    final = settled_reply(settlement, confirmation)
+    if not final.done():
+        return f"Purchase pending until the payment settles: {result}", final
+    return final.result() or f"Purchase failed, the payment did not go through: {result}", final
+
 def call_main() -> str:
-    """Execute the main.py file in the root directory"""
+    """Run the payment process in-process on the shared payment dispatcher"""
     try:
-        import subprocess
-        import os
-        
-        # Get the root directory path
-        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        main_path = os.path.join(root_dir, 'main.py')
-        
-        # Run the main.py script
-        result = subprocess.run(['python', main_path], capture_output=True, text=True)
-        return result.stdout if result.stdout else "Main script executed successfully"
+        result = dispatch_payment()
+        return result if result else "Main script executed successfully"
     except Exception as e:
         return f"Error executing main script: {str(e)}"
 
-# Define tools for the agent
-tools = [
-    Tool(
+# Tools for the agent; the LangChain Tool objects are built with the agent
+TOOL_SPECS = [
+    dict(
         name="SearchTickets",
         func=search_tickets,
         description="Search for available concert tickets. Input should be a string with search criteria."
     ),
-    Tool(
+    dict(
+        name="FindTickets",
+        func=find_tickets,
+        description="Find the cheapest tickets matching price, date and seat filters. Input should be name=value pairs separated by commas, e.g. max_price=200, within_days=30, min_quantity=2. Supported names: max_price, min_price, start_date, end_date (YYYY-MM-DD), within_days, min_quantity, venue, artist."
+    ),
+    dict(
         name="GetTicketDetails",
         func=get_ticket_details,
         description="Get detailed information about specific tickets. Input should be the event ID."
     ),
-    Tool(
+    dict(
         name="ProcessPurchase",
         func=process_purchase,
-        description="Process the ticket purchase. Input should be a dictionary with ticket details."
+        description="Process the ticket purchase. Input should be a JSON string with event_id, section, quantity, and total_price."
     ),
-    Tool(
+    dict(
         name="CallMain",
         func=call_main,
         description="Execute the main.py script from the root directory."
     )
 ]
 
-# Create the Gemini Pro agent
-llm = ChatGoogleGenerativeAI(model="gemini-pro", temperature=0.7)
-
 # Define the agent prompt
 template = """You are a helpful concert ticket booking assistant. You can help users find and purchase concert tickets.
 You have access to the following tools:
@@ -128,39 +189,121 @@ Let's approach this step by step:
 
 """
 
-prompt = PromptTemplate.from_template(template)
-
-# Create the agent
-agent = (
-    {
-        "input": lambda x: x["input"],
-        "chat_history": lambda x: x.get("chat_history", ""),
-        "agent_scratchpad": lambda x: format_log_to_str(x["intermediate_steps"]),
-        "tools": lambda x: render_text_description(tools),
-    }
-    | prompt
-    | llm
-    | ReActSingleInputOutputParser()
-)
-
-# Create the agent executor
-agent_executor = AgentExecutor(
-    agent=agent,
-    tools=tools,
-    verbose=True,
-    handle_parsing_errors=True,
-    max_iterations=3
-)
-
-def chat_with_agent(user_input: str) -> str:
-    """Function to interact with the agent"""
+# Tool descriptions are rendered once and observations trimmed to fit the prompt
+prompt_budget = PromptBudget()
+
+MODEL_NAME = "gemini-pro"
+
+# The LLM stack is imported and built on first use, so the tools and the
+# fast path below work without LangChain or a Google key
+_llm = None
+_agent_executor = None
+_agent_lock = threading.RLock()
+
+def get_llm():
+    """Return the shared Gemini Pro chat model"""
+    global _llm
+    with _agent_lock:
+        if _llm is None:
+            import google.generativeai as genai
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            genai.configure(api_key=GOOGLE_API_KEY)
+            _llm = ChatGoogleGenerativeAI(model=MODEL_NAME, temperature=0.7)
+        return _llm
+
+def get_agent_executor():
+    """Return the shared agent executor around ``get_llm()``"""
+    global _agent_executor
+    with _agent_lock:
+        if _agent_executor is None:
+            _agent_executor = build_agent_executor(get_llm())
+        return _agent_executor
+
+def build_agent_executor(llm, verbose: bool = True):
+    """Build the ReAct agent and its executor around ``llm``"""
+    from langchain.agents import Tool, AgentExecutor
+    from langchain.agents.output_parsers import ReActSingleInputOutputParser
+    from langchain.prompts import PromptTemplate
+
+    tools = [Tool(**spec) for spec in TOOL_SPECS]
+    tool_text = prompt_budget.render_tools(tools)
+    prompt = PromptTemplate.from_template(template)
+    agent = (
+        {
+            "input": lambda x: x["input"],
+            "chat_history": lambda x: x.get("chat_history", ""),
+            "agent_scratchpad": lambda x: prompt_budget.format_scratchpad(x["intermediate_steps"]),
+            "tools": lambda x: tool_text,
+        }
+        | prompt
+        | prompt_budget.count_prompt
+        | llm
+        | prompt_budget.count_completion
+        | ReActSingleInputOutputParser()
+    )
+
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=verbose,
+        handle_parsing_errors=True,
+        max_iterations=3,
+        return_intermediate_steps=True,
+    )
+
+# Repeated questions are answered from the cache; purchase turns never are
+response_cache = AgentResponseCache(normalize=True, side_effect_tools={"ProcessPurchase", "CallMain"})
+
+def cache_fingerprint() -> str:
+    """Fingerprint of the data the tools read, for the response cache"""
+    # Cached answers are only valid for the event data they were built from
+    return str(event_store.version)
+
+# Unambiguous inputs are answered directly; everything else goes to the agent
+intent_router = IntentRouter()
+intent_router.add("list", LIST_PATTERN, lambda: str({"events": event_store.all()}))
+# Only explicit lookups ("event 2"); a bare number is left to the agent, e.g. a quantity
+intent_router.add("event_id", EVENT_ID_PATTERN, get_ticket_details, when=lambda event_id: event_id in event_store)
+intent_router.add_json("purchase", ("event_id", "section", "quantity", "total_price"), process_purchase)
+
+# Recent turns verbatim plus a summary of older ones, per conversation
+conversations = SessionMemoryStore()
+
+def stream_to(printer: TurnPrinter):
+    """Run an agent turn, streaming tool calls and answer tokens to ``printer``"""
+    return lambda executor, inputs: stream_agent_turn(
+        executor, inputs, printer, on_action=printer.action, on_observation=printer.observation
+    )
+
+def chat_with_agent(user_input: str, printer: Optional[TurnPrinter] = None, session_id: str = "cli") -> str:
+    """Function to interact with the agent; with a printer the turn is streamed to it"""
     try:
-        response = agent_executor.invoke({"input": user_input})
-        return response["output"]
+        memory = conversations.get(session_id)
+
+        # Purchases are idempotent per conversation, across retries and restarts
+        with purchase_scope(session_id):
+            # "list", "event <id>" lookups and purchase JSON skip the LLM entirely
+            answer = intent_router.route(user_input)
+            if answer is None:
+                with prompt_budget.turn() as usage:
+                    response = response_cache.invoke(
+                        get_agent_executor(), {"input": user_input, "chat_history": memory.render()},
+                        model=MODEL_NAME, fingerprint=cache_fingerprint(),
+                        run=stream_to(printer) if printer is not None else None
+                    )
+                if printer is not None:
+                    printer.usage = usage
+                answer = response["output"]
+
+        # Later turns see this one, so the agent need not search again
+        memory.add(user_input, answer)
+        return answer
     except Exception as e:
         return f"Error: {str(e)}"
 
 if __name__ == "__main__":
+    # Stream tool calls and answer tokens as they arrive; --no-stream prints whole answers
+    streaming = "--no-stream" not in sys.argv
     print("Welcome to the Concert Ticket Booking System!")
     print("You can ask about available tickets, get details, or make a purchase.")
     print("Type 'quit' to exit.")
@@ -170,5 +313,14 @@ if __name__ == "__main__":
         if user_input.lower() == 'quit':
             break
             
-        response = chat_with_agent(user_input)
-        print(f"\nAssistant: {response}")
+        if not streaming:
+            response = chat_with_agent(user_input)
+            print(f"\nAssistant: {response}")
+            continue
+
+        printer = TurnPrinter()
+        response = chat_with_agent(user_input, printer)
+        if not printer.tokens:
+            # Routed, cached and error answers arrive whole
+            printer(response)
+        printer.finish()
@@ -1,24 +1,35 @@
 import os
-from typing import Dict, Any, List
+import sys
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
-from langchain.agents import Tool, AgentExecutor
-from langchain.agents.format_scratchpad import format_log_to_str
-from langchain.agents.output_parsers import ReActSingleInputOutputParser
-from langchain_openai import ChatOpenAI
-from langchain.tools.render import render_text_description
-from langchain.prompts import PromptTemplate
-from langchain.schema import AgentAction, AgentFinish
 import re
-from ticket_data import concert_tickets
+from ticket_data import concert_tickets, event_store, reservations
+from reservations import SETTLEMENT_HOLD_SECONDS
 import json
 from datetime import datetime
 
+# Make the payment modules in the root directory importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from payment_dispatcher import dispatch_payment_settled, settled_reply
+from idempotency import get_purchase_cache, purchase_key, purchase_scope
+from agent_cache import AgentResponseCache
+from intent_router import IntentRouter, EVENT_ID_PATTERN, LIST_PATTERN
+from agent_streaming import FINAL_ANSWER_MARKER, TurnPrinter, stream_agent_turn
+from prompt_budget import PromptBudget
+from conversation_memory import SessionMemoryStore
+
 # Load environment variables
 load_dotenv()
 
 # Configure OpenAI
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
+# "react" parses Thought/Action text; "tools" uses the model's native function calling
+AGENT_MODES = ("react", "tools")
+AGENT_MODE = os.getenv("TICKET_AGENT_MODE", "react")
+
 def format_event_details(event: Dict) -> str:
     """Format event details in a readable way"""
     try:
@@ -56,18 +67,17 @@ def search_tickets(query: str) -> str:
 
 def get_ticket_details(event_id: str) -> str:
     """Get detailed information about specific tickets"""
-    from ticket_data import fetch_events, concert_tickets
+    from ticket_data import fetch_events, event_store
     
-    # First try to find in fetched events
-    events = fetch_events()
-    for event in events["events"]:
-        if event["id"] == event_id:
-            return format_event_details(event)
+    # Answer from the event store while its copy is fresh
+    event = event_store.get(event_id)
+    if event is None or event_store.is_stale(event_id):
+        # Refresh the store with a new search, falling back to the stale copy
+        fetch_events()
+        event = event_store.get(event_id) or event
     
-    # Fallback to sample data
-    for event in concert_tickets["events"]:
-        if event["id"] == event_id:
-            return format_event_details(event)
+    if event is not None:
+        return format_event_details(event)
     
     return "Event not found. Please check the event ID and try again."
 
@@ -76,6 +86,17 @@ def process_purchase(ticket_info_str: str) -> str:
     try:
         # Parse the ticket info string into a dictionary
         ticket_info = json.loads(ticket_info_str)
+    except json.JSONDecodeError:
+        return "Invalid ticket information format. Please provide the information in the correct format."
+    return purchase(ticket_info)
+
+def purchase_tickets(event_id: str, section: str, quantity: int, total_price: float) -> str:
+    """Buy tickets in one section of an event; total_price is quantity times the section price"""
+    return purchase({"event_id": event_id, "section": section, "quantity": quantity, "total_price": total_price})
+
+def purchase(ticket_info: Dict[str, Any]) -> str:
+    """Validate an order and pay for it"""
+    try:
         required_fields = ['event_id', 'section', 'quantity', 'total_price']
         
         # Validate required fields
@@ -83,44 +104,78 @@ def process_purchase(ticket_info_str: str) -> str:
         if missing_fields:
             return f"Missing required information: {', '.join(missing_fields)}"
         
-        # Import the transaction module dynamically
-        import sys
-        sys.path.append('../transaction')
-        from process_transaction import process_payment
-        
-        # Call the process_payment function
-        result = process_payment(ticket_info)
-        return f" Purchase successful!\n\nOrder Details:\n- Event ID: {ticket_info['event_id']}\n- Section: {ticket_info['section']}\n- Quantity: {ticket_info['quantity']}\n- Total: ${ticket_info['total_price']:.2f}\n\nThank you for your purchase! Your tickets will be emailed to you shortly."
-    except json.JSONDecodeError:
-        return "Invalid ticket information format. Please provide the information in the correct format."
+        # Pay at most once per order, however often the agent retries the tool;
+        # a pending reply is replaced once the payment settles
+        return get_purchase_cache().get_or_settle(
+            purchase_key(ticket_info),
+            lambda: complete_purchase(ticket_info)
+        )
     except Exception as e:
         return f"Error processing purchase: {str(e)}"
 
-# Define tools for the agent
-tools = [
-    Tool(
+def complete_purchase(ticket_info: Dict[str, Any]) -> Tuple[str, Optional[Future]]:
+    """Pay for a validated order; return the reply and, for an on-chain
+    payment, a Future of the final reply (None if the payment fails)"""
+    # Hold the seats while paying so concurrent buyers cannot oversell the section;
+    # the hold is released if the payment fails
+    hold_id = reservations.hold(ticket_info['event_id'], ticket_info['section'], int(ticket_info['quantity']),
+                                hold_seconds=SETTLEMENT_HOLD_SECONDS)
+    try:
+        # Process the payment in-process on the shared dispatcher
+        result, settlement = dispatch_payment_settled(ticket_info)
+    except BaseException:
+        reservations.release(hold_id)
+        raise
+
+    confirmation = f" Purchase successful!\n\nOrder Details:\n- Event ID: {ticket_info['event_id']}\n- Section: {ticket_info['section']}\n- Quantity: {ticket_info['quantity']}\n- Total: ${ticket_info['total_price']:.2f}\n\nThank you for your purchase! Your tickets will be emailed to you shortly."
+    if settlement is None:
+        reservations.commit(hold_id)
+        return confirmation, None
+
+    # An on-chain transfer sells the seats only once it confirms, and releases them if it fails
+    reservations.commit_when(hold_id, settlement)
+    final = settled_reply(settlement, confirmation)
+    if not final.done():
+        return f" Purchase pending: your seats are held while the payment settles.\n\n{result}", final
+    return final.result() or f" Purchase failed: the payment did not go through.\n\n{result}", final
+
+# Tools for the agent; the LangChain Tool objects are built with the agent
+TOOL_SPECS = [
+    dict(
         name="SearchTickets",
         func=search_tickets,
         description="Search for available concert tickets. Input should be a search query (e.g., artist name, city, or 'all' for all events)."
     ),
-    Tool(
+    dict(
         name="GetTicketDetails",
         func=get_ticket_details,
         description="Get detailed information about a specific event. Input should be the event ID."
     ),
-    Tool(
+    dict(
         name="ProcessPurchase",
         func=process_purchase,
         description="Process the ticket purchase. Input should be a JSON string with event_id, section, quantity, and total_price."
     )
 ]
 
-# Create the GPT-4 agent
-llm = ChatOpenAI(
-    model="gpt-4",
-    temperature=0.7,
-    api_key=OPENAI_API_KEY
-)
+# Tools for function calling; their argument schemas come from the functions' type hints
+FUNCTION_TOOL_SPECS = [
+    dict(
+        name="SearchTickets",
+        func=search_tickets,
+        description="Search for available concert tickets by artist name, city or keyword; an empty query lists all events."
+    ),
+    dict(
+        name="GetTicketDetails",
+        func=get_ticket_details,
+        description="Get detailed information and ticket prices for one event by its ID."
+    ),
+    dict(
+        name="ProcessPurchase",
+        func=purchase_tickets,
+        description="Buy tickets in one section of an event. total_price is quantity times the section price."
+    )
+]
 
 # Define the agent prompt
 template = """You are a helpful and enthusiastic concert ticket booking assistant. You help users find and purchase concert tickets while maintaining a friendly and professional tone.
@@ -165,61 +220,227 @@ Question: {input}
 
 Let's help this customer find their perfect concert tickets!"""
 
-prompt = PromptTemplate.from_template(template)
+# System prompt of the function-calling agent; tools are described by their schemas
+function_calling_template = """You are a helpful and enthusiastic concert ticket booking assistant. You help users find and purchase concert tickets while maintaining a friendly and professional tone.
 
-class StrictReActOutputParser(ReActSingleInputOutputParser):
-    def parse(self, text: str) -> AgentAction | AgentFinish:
-        if "Final Answer:" in text:
-            return AgentFinish(
-                return_values={"output": text.split("Final Answer:")[-1].strip()},
-                log=text,
-            )
-        
-        # Extract Action and Action Input using regex
-        action_match = re.search(r"Action: (.*?)[\n]", text)
-        action_input_match = re.search(r"Action Input: (.*?)[\n]", text)
-        
-        if not action_match or not action_input_match:
-            raise ValueError(
-                "Could not parse LLM output. Remember to respond with 'Action:' and 'Action Input:'"
+Follow these guidelines:
+1. When searching for tickets, ask for specific preferences (artist, city, date range), present options clearly with event IDs and highlight price and availability.
+2. Before a purchase, confirm all details, ensure the quantity is available and double-check the total price.
+3. Suggest alternatives if events are not found and handle errors gracefully.
+4. When you need several independent lookups, request all of them at once.
+
+{chat_history}"""
+
+def parse_strict_react(text: str):
+    """Parse a ReAct step into an AgentAction, or an AgentFinish once there is a final answer"""
+    from langchain.schema import AgentAction, AgentFinish, OutputParserException
+
+    if "Final Answer:" in text:
+        return AgentFinish(
+            return_values={"output": text.split("Final Answer:")[-1].strip()},
+            log=text,
+        )
+    
+    # Extract Action and Action Input using regex
+    action_match = re.search(r"Action: (.*?)[\n]", text)
+    action_input_match = re.search(r"Action Input: (.*?)[\n]", text)
+    
+    if not action_match or not action_input_match:
+        # An OutputParserException, so handle_parsing_errors feeds it back to the model
+        raise OutputParserException(
+            "Could not parse LLM output. Remember to respond with 'Action:' and 'Action Input:'",
+            llm_output=text
+        )
+    
+    action = action_match.group(1).strip()
+    action_input = action_input_match.group(1).strip()
+    
+    return AgentAction(tool=action, tool_input=action_input, log=text)
+
+# Tool descriptions are rendered once and observations trimmed to fit the prompt
+prompt_budget = PromptBudget()
+
+MODEL_NAME = "gpt-4"
+
+# The LLM stack is imported and built on first use, so the tools and the
+# fast path below work without LangChain or an OpenAI key
+_llm = None
+_agent_executor = None
+_agent_lock = threading.RLock()
+
+def get_llm():
+    """Return the shared GPT-4 chat model"""
+    global _llm
+    with _agent_lock:
+        if _llm is None:
+            from langchain_openai import ChatOpenAI
+            _llm = ChatOpenAI(
+                model=MODEL_NAME,
+                temperature=0.7,
+                api_key=OPENAI_API_KEY
             )
-        
-        action = action_match.group(1).strip()
-        action_input = action_input_match.group(1).strip()
-        
-        return AgentAction(tool=action, tool_input=action_input, log=text)
-
-# Create the agent
-agent = (
-    {
-        "input": lambda x: x["input"],
-        "chat_history": lambda x: x.get("chat_history", ""),
-        "agent_scratchpad": lambda x: format_log_to_str(x["intermediate_steps"]),
-        "tools": lambda x: render_text_description(tools),
-    }
-    | prompt
-    | llm
-    | StrictReActOutputParser()
-)
-
-# Create the agent executor
-agent_executor = AgentExecutor(
-    agent=agent,
-    tools=tools,
-    verbose=True,
-    handle_parsing_errors=True,
-    max_iterations=3
-)
-
-def chat_with_agent(user_input: str) -> str:
-    """Function to interact with the agent"""
+        return _llm
+
+def get_agent_executor():
+    """Return the shared agent executor around ``get_llm()``"""
+    global _agent_executor
+    with _agent_lock:
+        if _agent_executor is None:
+            _agent_executor = build_agent_executor(get_llm())
+        return _agent_executor
+
+def build_agent_executor(llm, verbose: bool = True, mode: Optional[str] = None):
+    """Build the agent and its executor around ``llm``; ``mode`` defaults to ``AGENT_MODE``"""
+    mode = mode or AGENT_MODE
+    if mode not in AGENT_MODES:
+        raise ValueError(f"Unknown agent mode {mode!r}, expected one of {', '.join(AGENT_MODES)}")
+    if mode == "tools":
+        return build_tool_calling_executor(llm, verbose)
+
+    from langchain.agents import Tool, AgentExecutor
+    from langchain.agents.output_parsers import ReActSingleInputOutputParser
+    from langchain.prompts import PromptTemplate
+
+    class StrictReActOutputParser(ReActSingleInputOutputParser):
+        def parse(self, text: str):
+            return parse_strict_react(text)
+
+    tools = [Tool(**spec) for spec in TOOL_SPECS]
+    tool_text = prompt_budget.render_tools(tools)
+    prompt = PromptTemplate.from_template(template)
+    agent = (
+        {
+            "input": lambda x: x["input"],
+            "chat_history": lambda x: x.get("chat_history", ""),
+            "agent_scratchpad": lambda x: prompt_budget.format_scratchpad(x["intermediate_steps"]),
+            "tools": lambda x: tool_text,
+        }
+        | prompt
+        | prompt_budget.count_prompt
+        | llm
+        | prompt_budget.count_completion
+        | StrictReActOutputParser()
+    )
+
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=verbose,
+        handle_parsing_errors=True,
+        max_iterations=3,
+        return_intermediate_steps=True,
+    )
+
+def build_tool_calling_executor(llm, verbose: bool = True):
+    """Build the native function-calling agent and its executor around ``llm``"""
+    from langchain.agents import AgentExecutor
+    from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
+    from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
+    from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+    from langchain.tools import StructuredTool
+
+    # ProcessPurchase gets typed event_id/section/quantity/total_price arguments, not a JSON string
+    tools = [StructuredTool.from_function(**spec) for spec in FUNCTION_TOOL_SPECS]
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", function_calling_template),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+    agent = (
+        {
+            "input": lambda x: x["input"],
+            "chat_history": lambda x: x.get("chat_history", ""),
+            "agent_scratchpad": lambda x: format_to_openai_tool_messages(
+                prompt_budget.compact_steps(x["intermediate_steps"])
+            ),
+        }
+        | prompt
+        | prompt_budget.count_prompt
+        # One response may call several tools; the executor runs them all before the next call
+        | llm.bind_tools(tools)
+        | prompt_budget.count_completion
+        | OpenAIToolsAgentOutputParser()
+    )
+
+    return AgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=verbose,
+        handle_parsing_errors=True,
+        max_iterations=3,
+        return_intermediate_steps=True,
+    )
+
+def answer_marker(mode: Optional[str] = None) -> Optional[str]:
+    """Text that precedes the answer in the model output; function-calling answers have none"""
+    return None if (mode or AGENT_MODE) == "tools" else FINAL_ANSWER_MARKER
+
+def run_concurrently(executor, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a turn on an event loop, so the tool calls of one model response run at once"""
+    import asyncio
+    return asyncio.run(executor.ainvoke(inputs))
+
+# Repeated questions are answered from the cache; purchase turns never are
+response_cache = AgentResponseCache(normalize=True, side_effect_tools={"ProcessPurchase"})
+
+def cache_fingerprint() -> str:
+    """Fingerprint of the data the tools read, for the response cache"""
+    # Cached answers are only valid for the event data and the agent mode they were built from
+    return f"{event_store.version}:{AGENT_MODE}"
+
+# Unambiguous inputs are answered directly; everything else goes to the agent
+intent_router = IntentRouter()
+intent_router.add("list", LIST_PATTERN, lambda: search_tickets(""))
+# Only explicit lookups ("event 2"); a bare number is left to the agent, e.g. a quantity
+intent_router.add("event_id", EVENT_ID_PATTERN, get_ticket_details, when=lambda event_id: event_id in event_store)
+intent_router.add_json("purchase", ("event_id", "section", "quantity", "total_price"), purchase)
+
+# Recent turns verbatim plus a summary of older ones, per conversation
+conversations = SessionMemoryStore()
+
+def stream_to(printer: TurnPrinter):
+    """Run an agent turn, streaming tool calls and answer tokens to ``printer``"""
+    return lambda executor, inputs: stream_agent_turn(
+        executor, inputs, printer, on_action=printer.action, on_observation=printer.observation,
+        marker=answer_marker()
+    )
+
+def chat_with_agent(user_input: str, printer: Optional[TurnPrinter] = None, session_id: str = "cli") -> str:
+    """Function to interact with the agent; with a printer the turn is streamed to it"""
     try:
-        response = agent_executor.invoke({"input": user_input})
-        return response["output"]
+        memory = conversations.get(session_id)
+
+        # Purchases are idempotent per conversation, across retries and restarts
+        with purchase_scope(session_id):
+            # "list", "event <id>" lookups and purchase JSON skip the LLM entirely
+            answer = intent_router.route(user_input)
+            if answer is None:
+                if printer is not None:
+                    run = stream_to(printer)
+                else:
+                    # Tool calls requested together in one function-calling response run at once
+                    run = run_concurrently if AGENT_MODE == "tools" else None
+                with prompt_budget.turn() as usage:
+                    response = response_cache.invoke(
+                        get_agent_executor(), {"input": user_input, "chat_history": memory.render()},
+                        model=MODEL_NAME, fingerprint=cache_fingerprint(), run=run
+                    )
+                if printer is not None:
+                    printer.usage = usage
+                answer = response["output"]
+
+        # Later turns see this one, so the agent need not search again
+        memory.add(user_input, answer)
+        return answer
     except Exception as e:
         return f"I apologize, but I encountered an error: {str(e)}\nHow else can I help you with your ticket search?"
 
 if __name__ == "__main__":
+    # Stream tool calls and answer tokens as they arrive; --no-stream prints whole answers
+    streaming = "--no-stream" not in sys.argv
+    # --tools switches from ReAct text parsing to native function calling
+    if "--tools" in sys.argv:
+        AGENT_MODE = "tools"
     print("""
  Welcome to the Concert Ticket Booking System! 
 
@@ -237,5 +458,14 @@ Just let me know what you're looking for! Type 'quit' to exit.
             print("\nThank you for using our ticket booking service! Have a great day! ")
             break
             
-        response = chat_with_agent(user_input)
-        print(f"\nAssistant: {response}")
+        if not streaming:
+            response = chat_with_agent(user_input)
+            print(f"\nAssistant: {response}")
+            continue
+
+        printer = TurnPrinter()
+        response = chat_with_agent(user_input, printer)
+        if not printer.tokens:
+            # Routed, cached and error answers arrive whole
+            printer(response)
+        printer.finish()
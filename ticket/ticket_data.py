@@ -1,10 +1,18 @@
 import os
-from typing import Dict, Any, Optional
-import requests
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import logging
 import json
+from response_cache import ResponseCache
+from event_store import EventStore
+from search_index import SearchIndex
+from reservations import ReservationEngine
+from rate_limit import TokenBucket, backoff_delay, retry_after_seconds
 
 # Set up logging
 logging.basicConfig(
@@ -16,32 +24,115 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+# Without a key every search falls back to the sample data below
 TICKETMASTER_API_KEY = os.getenv("TICKETMASTER_API_KEY")
-if not TICKETMASTER_API_KEY:
-    raise ValueError("TICKETMASTER_API_KEY not found in environment variables")
 
 BASE_URL = "https://app.ticketmaster.com/discovery/v2"
 
-def make_api_request(url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+# The Discovery API only serves results up to size * page < 1000
+MAX_DEEP_PAGING_RESULTS = 1000
+
+# Shared response cache; set TICKETMASTER_CACHE_PATH to keep responses on disk too
+response_cache = ResponseCache(disk_path=os.getenv("TICKETMASTER_CACHE_PATH"))
+
+# Every event seen by a search, for lookups by ID, venue and date
+event_store = EventStore()
+
+# Full-text index over the event store, updated as events are added
+search_index = SearchIndex()
+event_store.subscribe(search_index.add)
+
+# Seat holds taken while a purchase is paid for, stocked from each event's tickets
+reservations = ReservationEngine()
+event_store.subscribe(reservations.load_event)
+
+# Discovery API quota is 5 requests per second per key
+RATE_LIMIT_PER_SECOND = float(os.getenv("TICKETMASTER_RATE_LIMIT", "5"))
+REQUEST_TIMEOUT = 10
+MAX_RETRIES = 4
+# Waits longer than this (e.g. the daily quota is used up) fall back to sample data
+MAX_RETRY_WAIT = 30
+
+# Client-side rate limiter shared by all requests
+rate_limiter = TokenBucket(rate=RATE_LIMIT_PER_SECOND, capacity=RATE_LIMIT_PER_SECOND)
+
+# Built on first use, so importing this module stays cheap
+_session = None
+_ticket_inventory = None
+_lazy_lock = threading.Lock()
+
+def get_session():
+    """Return the pooled keep-alive HTTP session shared by all requests"""
+    global _session
+    with _lazy_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        return _session
+
+def get_ticket_inventory():
+    """Return the columnar view of every known ticket offer, for bulk price/date/quantity filters"""
+    global _ticket_inventory
+    with _lazy_lock:
+        if _ticket_inventory is None:
+            # NumPy is only loaded when tickets are first filtered
+            from inventory import TicketInventory
+            _ticket_inventory = TicketInventory()
+            event_store.subscribe(_ticket_inventory.add_event)
+        return _ticket_inventory
+
+def make_api_request(url: str, params: Dict[str, Any], use_cache: bool = True) -> Optional[Dict[str, Any]]:
     """Make a request to the Ticketmaster API with error handling"""
+    import requests
+
+    if not params.get("apikey"):
+        logger.warning("TICKETMASTER_API_KEY not set, skipping API request")
+        return None
+
+    if use_cache:
+        cached = response_cache.get(url, params)
+        if cached is not None:
+            return cached
+
     try:
-        response = requests.get(url, params=params)
-        
-        if response.status_code == 429:
-            logger.error("Rate limit exceeded")
-            return None
+        for attempt in range(MAX_RETRIES + 1):
+            rate_limiter.acquire()
+            response = get_session().get(url, params=params, timeout=REQUEST_TIMEOUT)
+            
+            if response.status_code == 429:
+                # Honor the server's wait if it gives one, otherwise back off with jitter
+                wait = retry_after_seconds(response.headers)
+                wait = backoff_delay(attempt) if wait is None else wait + backoff_delay(0, base=0.25)
+                if attempt == MAX_RETRIES or wait > MAX_RETRY_WAIT:
+                    logger.error("Rate limit exceeded")
+                    return None
+                logger.warning(f"Rate limited, retrying in {wait:.1f}s")
+                rate_limiter.pause_until(time.monotonic() + wait)
+                continue
             
-        response.raise_for_status()
-        return response.json()
+            # Stop sending before the server starts rejecting requests
+            if response.headers.get("Rate-Limit-Available") == "0":
+                wait = retry_after_seconds(response.headers)
+                if wait and wait <= MAX_RETRY_WAIT:
+                    rate_limiter.pause_until(time.monotonic() + wait)
+                
+            response.raise_for_status()
+            data = response.json()
+            
+            # Only cache real results, not API error payloads
+            if use_cache and "errors" not in data:
+                response_cache.put(url, params, data)
+            return data
         
     except requests.exceptions.RequestException as e:
         logger.error(f"API request failed: {e}")
         return None
 
-def fetch_events(keyword: str = None, city: str = None, start_date: str = None, end_date: str = None) -> Dict[str, Any]:
-    """Fetch events from Ticketmaster API"""
-    logger.info(f"Fetching events with keyword='{keyword}', city='{city}', start_date='{start_date}'")
-    
+def build_event_params(keyword: str = None, city: str = None, start_date: str = None, end_date: str = None,
+                       size: int = 10) -> Dict[str, Any]:
+    """Build the Discovery API query for an event search"""
     # Default to events in the next 30 days if no date provided
     if not start_date:
         start_date = datetime.now().strftime("%Y-%m-%d")
@@ -51,7 +142,7 @@ def fetch_events(keyword: str = None, city: str = None, start_date: str = None,
     params = {
         "apikey": TICKETMASTER_API_KEY,
         "classificationName": "music",
-        "size": 10,  # Reduced size to avoid rate limiting
+        "size": size,
         "startDateTime": f"{start_date}T00:00:00Z",
         "endDateTime": f"{end_date}T23:59:59Z",
         "sort": "date,asc",
@@ -63,6 +154,75 @@ def fetch_events(keyword: str = None, city: str = None, start_date: str = None,
         params["keyword"] = keyword
     if city:
         params["city"] = city
+    return params
+
+def transform_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform a Ticketmaster event into our format"""
+    # Extract venue information
+    venues = event.get("_embedded", {}).get("venues", [])
+    venue_name = venues[0].get("name", "Venue TBA") if venues else "Venue TBA"
+    
+    # Extract date and time
+    dates = event.get("dates", {})
+    start = dates.get("start", {})
+    event_time = start.get("localTime", "20:00")
+    event_date = start.get("localDate", datetime.now().strftime("%Y-%m-%d"))
+    
+    # Extract pricing if available
+    price_ranges = event.get("priceRanges", [])
+    if not price_ranges and event.get("seatmap"):
+        # If no price ranges but seatmap exists, add a placeholder price
+        price_ranges = [{"min": 0.0, "max": 0.0}]
+    
+    event_data = {
+        "id": event.get("id", "unknown"),
+        "artist": event.get("name", "Unknown Artist"),
+        "venue": venue_name,
+        "date": event_date,
+        "time": event_time,
+        "available_tickets": []
+    }
+    
+    # Add ticket information
+    if price_ranges:
+        for i, price in enumerate(price_ranges):
+            section_name = f"Section {chr(65 + i)}"  # A, B, C, etc.
+            ticket = {
+                "section": section_name,
+                "row": str(i + 1),
+                "price": price.get("min", 0.0),
+                "quantity": 10
+            }
+            event_data["available_tickets"].append(ticket)
+    else:
+        # Add a default ticket option if no pricing is available
+        event_data["available_tickets"].append({
+            "section": "General Admission",
+            "row": "1",
+            "price": 0.0,  # Price to be announced
+            "quantity": 10
+        })
+    
+    return event_data
+
+def transform_events(events_data: List[Dict[str, Any]], store: bool = True) -> Iterator[Dict[str, Any]]:
+    """Transform Ticketmaster events, skipping any that cannot be processed; ``store`` adds them to the event store"""
+    for event in events_data:
+        try:
+            event_data = transform_event(event)
+        except Exception as e:
+            logger.error(f"Error processing event data: {e}")
+            continue
+        logger.info(f"Successfully processed event: {event_data['artist']} at {event_data['venue']}")
+        if store:
+            event_store.add(event_data)
+        yield event_data
+
+def fetch_events(keyword: str = None, city: str = None, start_date: str = None, end_date: str = None) -> Dict[str, Any]:
+    """Fetch events from Ticketmaster API"""
+    logger.info(f"Fetching events with keyword='{keyword}', city='{city}', start_date='{start_date}'")
+    
+    params = build_event_params(keyword, city, start_date, end_date, size=10)  # Reduced size to avoid rate limiting
 
     logger.info(f"Making API request to {BASE_URL}/events.json")
     
@@ -85,60 +245,7 @@ def fetch_events(keyword: str = None, city: str = None, start_date: str = None,
     logger.info(f"Found {len(events_data)} events in API response")
     
     # Transform Ticketmaster data into our format
-    events = []
-    for event in events_data:
-        try:
-            # Extract venue information
-            venues = event.get("_embedded", {}).get("venues", [])
-            venue_name = venues[0].get("name", "Venue TBA") if venues else "Venue TBA"
-            
-            # Extract date and time
-            dates = event.get("dates", {})
-            start = dates.get("start", {})
-            event_time = start.get("localTime", "20:00")
-            event_date = start.get("localDate", datetime.now().strftime("%Y-%m-%d"))
-            
-            # Extract pricing if available
-            price_ranges = event.get("priceRanges", [])
-            if not price_ranges and event.get("seatmap"):
-                # If no price ranges but seatmap exists, add a placeholder price
-                price_ranges = [{"min": 0.0, "max": 0.0}]
-            
-            event_data = {
-                "id": event.get("id", "unknown"),
-                "artist": event.get("name", "Unknown Artist"),
-                "venue": venue_name,
-                "date": event_date,
-                "time": event_time,
-                "available_tickets": []
-            }
-            
-            # Add ticket information
-            if price_ranges:
-                for i, price in enumerate(price_ranges):
-                    section_name = f"Section {chr(65 + i)}"  # A, B, C, etc.
-                    ticket = {
-                        "section": section_name,
-                        "row": str(i + 1),
-                        "price": price.get("min", 0.0),
-                        "quantity": 10
-                    }
-                    event_data["available_tickets"].append(ticket)
-            else:
-                # Add a default ticket option if no pricing is available
-                event_data["available_tickets"].append({
-                    "section": "General Admission",
-                    "row": "1",
-                    "price": 0.0,  # Price to be announced
-                    "quantity": 10
-                })
-            
-            events.append(event_data)
-            logger.info(f"Successfully processed event: {event_data['artist']} at {event_data['venue']}")
-        
-        except Exception as e:
-            logger.error(f"Error processing event data: {e}")
-            continue
+    events = list(transform_events(events_data))
     
     if not events:
         logger.warning("No events could be processed, falling back to sample data")
@@ -147,6 +254,58 @@ def fetch_events(keyword: str = None, city: str = None, start_date: str = None,
     logger.info(f"Successfully processed {len(events)} events")
     return {"events": events}
 
+def fetch_events_page(params: Dict[str, Any], page: int) -> Optional[Dict[str, Any]]:
+    """Fetch one page of an event search"""
+    return make_api_request(f"{BASE_URL}/events.json", {**params, "page": page})
+
+def iter_events(keyword: str = None, city: str = None, start_date: str = None, end_date: str = None,
+                page_size: int = 100, prefetch: int = 2, store: bool = False) -> Iterator[Dict[str, Any]]:
+    """Stream every event matching a search, page by page.
+
+    While one page is being yielded the next ``prefetch`` pages are fetched
+    concurrently, so at most ``prefetch + 1`` pages are held in memory no
+    matter how many events match. Unlike fetch_events this never falls back
+    to sample data; it simply stops if a page cannot be fetched. Streamed
+    events are only added to the (unbounded) event store with ``store=True``,
+    so walking a large catalog keeps memory flat. The API
+    serves at most 1000 results per search, so split long date windows
+    into several searches to walk larger catalogs.
+    """
+    params = build_event_params(keyword, city, start_date, end_date, size=page_size)
+
+    first = fetch_events_page(params, 0)
+    if not first or "errors" in first:
+        logger.warning("Event search failed, no events to stream")
+        return
+
+    # The Discovery API refuses to page past its deep-paging limit
+    total_pages = first.get("page", {}).get("totalPages", 1)
+    total_pages = min(total_pages, MAX_DEEP_PAGING_RESULTS // page_size)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, prefetch), thread_name_prefix="event-pages")
+    try:
+        pending = deque()
+        next_page = 1
+        while next_page < total_pages and len(pending) < prefetch:
+            pending.append(pool.submit(fetch_events_page, params, next_page))
+            next_page += 1
+
+        data = first
+        while True:
+            yield from transform_events(data.get("_embedded", {}).get("events", []), store)
+            if not pending:
+                break
+
+            data = pending.popleft().result()
+            if next_page < total_pages:
+                pending.append(pool.submit(fetch_events_page, params, next_page))
+                next_page += 1
+            if not data or "errors" in data:
+                logger.warning("Event page request failed, stopping the stream")
+                break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
 # Sample fallback data
 concert_tickets = {
     "events": [
@@ -177,6 +336,9 @@ concert_tickets = {
     ]
 }
 
+# Sample events can be looked up like fetched ones; they never change, so never go stale
+event_store.add_many(concert_tickets["events"], pinned=True)
+
 if __name__ == "__main__":
     try:
         logger.info("Testing Ticketmaster API connection...")